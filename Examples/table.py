@@ -1,8 +1,10 @@
-from tkml import TKMLDriver, TKMLTopLevelDriver, TKMLWidgetBuilder
+from tkml import TKMLDriver, TKMLTopLevelDriver, TKMLWidgetBuilder, TKMLWindowPool
 import random
 import tkinter as tk
 
 widget_builder = TKMLWidgetBuilder()
+# Closed popups are hidden and reused instead of being rebuilt every time
+popup_pool = TKMLWindowPool(widget_builder, max_size=2)
 
 food_descriptors = [
     "Hot",
@@ -52,8 +54,7 @@ class TableExample(TKMLDriver):
         self.food_count.set(len(self["example_table"].get_children()))
 
     def checkout(self):
-        toplevel = Popup(self.food_count.get())
-        widget_builder.build_tkml_from_file(toplevel, "./table_popup.xml")
+        popup_pool.open(Popup, "./table_popup.xml", food_count=self.food_count.get())
 
 
 root = tk.Tk()
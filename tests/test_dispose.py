@@ -0,0 +1,73 @@
+import gc
+import os
+import tkinter as tk
+import unittest
+
+import tkml
+
+POPUP_XML = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "Examples", "table_popup.xml"
+)
+
+
+class Popup(tkml.TKMLTopLevelDriver):
+    def __init__(self, food_count):
+        super().__init__()
+        self.food_count = tk.IntVar(value=food_count)
+
+
+def rss_kb() -> int | None:
+    """Resident set size of this process in KB, None where /proc isn't available"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+@unittest.skipUnless(os.environ.get("DISPLAY"), "needs an X display")
+class DisposeTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.builder = tkml.TKMLWidgetBuilder(print_debug=False)
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def open_close(self, count: int):
+        for food_count in range(count):
+            popup = Popup(food_count)
+            self.builder.build_tkml_from_file(popup, POPUP_XML)
+            popup.close()
+        del popup
+        gc.collect()
+        self.root.update()
+
+    def tcl_counts(self) -> dict:
+        call = self.root.tk.call
+        splitlist = self.root.tk.splitlist
+        return {
+            "commands": len(splitlist(call("info", "commands"))),
+            "vars": len(splitlist(call("info", "vars"))),
+            "images": len(splitlist(call("image", "names"))),
+        }
+
+    def test_close_frees_everything(self):
+        # The first builds fill the layout cache and create the inline style
+        self.open_close(20)
+        counts = self.tcl_counts()
+        rss = rss_kb()
+
+        self.open_close(10000)
+
+        self.assertEqual(self.tcl_counts(), counts)
+        if rss is not None:
+            self.assertLess(rss_kb() - rss, 4096)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+
+import tkml
+
+
+class TableIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.rows = ["a", "b", "c", "d"]
+        self.text = tkml.TableIndex(
+            self.rows, ["Apple Pie", "Banana Bread", "apple tart", "Cherry"]
+        )
+        self.numbers = tkml.TableIndex(self.rows, ["5", "10", "15", "20"])
+
+    def test_numeric_columns(self):
+        self.assertTrue(self.numbers.numeric)
+        self.assertFalse(self.text.numeric)
+
+    def test_prefix(self):
+        self.assertEqual(self.text.lookup("app"), {"a", "c"})
+        self.assertEqual(self.text.lookup("app ta"), {"c"})
+        self.assertEqual(self.text.lookup("x"), set())
+
+    def test_prefix_narrowing_matches_lookup(self):
+        # filter() narrows a longer query with match() instead of a lookup
+        for term in ("app", "appl", "apple", "br"):
+            found = {row for row in self.rows if self.text.match(row, term)}
+            self.assertEqual(found, self.text.lookup(term))
+
+    def test_ranges(self):
+        self.assertEqual(self.numbers.lookup("10"), {"b"})
+        self.assertEqual(self.numbers.lookup(">=15"), {"c", "d"})
+        self.assertEqual(self.numbers.lookup(">15"), {"d"})
+        self.assertEqual(self.numbers.lookup("<10"), {"a"})
+        self.assertEqual(self.numbers.lookup("10..15"), {"b", "c"})
+        self.assertTrue(self.numbers.match("c", "10..15"))
+        self.assertFalse(self.numbers.match("d", "10..15"))
+        # Comparisons never match text columns
+        self.assertEqual(self.text.lookup(">5"), set())
+
+    def test_count_is_an_upper_bound(self):
+        for term in ("app", "app ta", "cherry"):
+            self.assertGreaterEqual(self.text.count(term), len(self.text.lookup(term)))
+
+    def test_add_and_remove(self):
+        self.text.add("e", "apple crumble")
+        self.numbers.add("e", "12")
+        self.assertEqual(self.text.lookup("app"), {"a", "c", "e"})
+        self.assertEqual(self.numbers.lookup("10..15"), {"b", "c", "e"})
+
+        self.text.remove({"a", "e", "missing"})
+        self.numbers.remove({"b"})
+        self.assertEqual(self.text.lookup("app"), {"c"})
+        self.assertFalse(self.text.match("a", "app"))
+        self.assertEqual(self.numbers.lookup("10..15"), {"c", "e"})
+
+    def test_remove_repeated_word(self):
+        index = tkml.TableIndex(["a", "b"], ["apple apple", "apple"])
+        index.remove({"a"})
+        self.assertEqual(index.lookup("apple"), {"b"})
+        self.assertEqual(index.count("apple"), 1)
+
+
+class PrefixIndexTest(unittest.TestCase):
+    def test_lookup(self):
+        index = tkml.PrefixIndex(["banana", "Apple", "apricot", "cherry", "avocado"])
+        self.assertEqual(index.lookup("ap", 10), ["Apple", "apricot"])
+        self.assertEqual(index.lookup("A", 2), ["Apple", "apricot"])
+        self.assertEqual(index.lookup("z", 10), [])
+        self.assertEqual(index.lookup("", 10)[0], "Apple")
+
+    def test_shared_and_rebuilt(self):
+        values = ["one", "two"]
+        index = tkml.get_prefix_index(values)
+        self.assertIs(tkml.get_prefix_index(values), index)
+        # Tuples are matched by contents
+        self.assertIs(tkml.get_prefix_index(("x",)), tkml.get_prefix_index(("x",)))
+
+        values.append("three")
+        self.assertEqual(tkml.get_prefix_index(values).lookup("t", 10), ["three", "two"])
+        values[0] = "tea"
+        tkml.invalidate_prefix_index(values)
+        self.assertEqual(index.lookup("t", 10), ["tea", "three", "two"])
+
+    def test_cache_is_bounded(self):
+        lists = [[str(number)] for number in range(tkml.recent_prefix_index_count * 2)]
+        for values in lists:
+            tkml.get_prefix_index(values)
+        self.assertLessEqual(
+            len(tkml._recent_prefix_indexes), tkml.recent_prefix_index_count
+        )
+
+
+class LineIndexTest(unittest.TestCase):
+    def setUp(self):
+        file_, self.path = tempfile.mkstemp()
+        os.close(file_)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write(self, data: bytes):
+        with open(self.path, "ab") as file_:
+            file_.write(data)
+
+    def check(self, index: tkml.LineIndex):
+        with open(self.path, "rb") as file_:
+            data = file_.read()
+        lines = data.split(b"\n")
+        if data.endswith(b"\n"):
+            lines.pop()
+        self.assertEqual(index.line_count(), len(lines))
+        position = 0
+        for line, content in enumerate(lines):
+            self.assertEqual(index.line_start(data, line), position)
+            position += len(content) + 1
+
+    def test_chunk_boundaries(self):
+        self.write(b"".join(b"x" * (line % 11) + b"\n" for line in range(300)))
+        for chunk_size in (1, 2, 7, 64, 1 << 20):
+            index = tkml.LineIndex(self.path, stride=4)
+            index.chunk_size = chunk_size
+            index.scan(os.path.getsize(self.path))
+            self.check(index)
+
+    def test_appended_in_parts(self):
+        index = tkml.LineIndex(self.path, stride=3)
+        index.chunk_size = 5
+        for part in (b"first line\nsec", b"ond\n", b"\n\nlast without newline"):
+            self.write(part)
+            index.scan(os.path.getsize(self.path))
+            self.check(index)
+
+    def test_truncated_while_scanning(self):
+        self.write(b"a\nb\n")
+        index = tkml.LineIndex(self.path)
+        # The file is shorter than the size the view saw
+        index.scan(100)
+        self.assertEqual(index.scanned, 4)
+        self.assertEqual(index.line_count(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import tkml
+
+
+class LayoutCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = tkml.TKMLLayoutCache()
+        self.writes = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as file_:
+            file_.write(text)
+        # Some filesystems only keep whole seconds, give every write its own mtime
+        self.writes += 1
+        os.utime(path, ns=(0, self.writes * 10**9))
+        return path
+
+    def test_include_is_expanded(self):
+        self.write("footer.xml", '<H><Label text="footer" /></H>')
+        main = self.write(
+            "main.xml",
+            '<V><Label text="body" /><Include src="footer.xml" fill="x" /></V>',
+        )
+        root = self.cache.get(main)
+        self.assertEqual([child.tag for child in root], ["Label", "H"])
+        # Attributes on the Include are added to the fragment's root
+        self.assertEqual(root[1].attrib, {"fill": "x"})
+        self.assertEqual(root[1][0].attrib, {"text": "footer"})
+        self.assertIs(self.cache.get(main), root)
+
+    def test_fragments_are_shared_not_changed(self):
+        fragment = self.write("fragment.xml", '<H><Label text="shared" /></H>')
+        first = self.write("first.xml", '<V><Include src="fragment.xml" /></V>')
+        second = self.write("second.xml", '<V><Include src="fragment.xml" /></V>')
+        fragment_root = self.cache.get(fragment)
+        self.assertIs(self.cache.get(first)[0][0], fragment_root[0])
+        self.assertIs(self.cache.get(second)[0][0], fragment_root[0])
+        self.assertEqual(len(fragment_root), 1)
+
+    def test_changed_fragment_invalidates_includer(self):
+        self.write("footer.xml", '<H><Label text="old" /></H>')
+        main = self.write("main.xml", '<V><Include src="footer.xml" /></V>')
+        other = self.write("other.xml", "<V />")
+        root = self.cache.get(main)
+        other_root = self.cache.get(other)
+
+        self.write("footer.xml", '<H><Label text="new text" /></H>')
+        changed = self.cache.get(main)
+        self.assertIsNot(changed, root)
+        self.assertEqual(changed[0][0].attrib["text"], "new text")
+        self.assertIs(self.cache.get(other), other_root)
+
+        self.cache.invalidate(other)
+        self.assertIsNot(self.cache.get(other), other_root)
+
+    def test_include_cycle(self):
+        first = self.write("first.xml", '<V><Include src="second.xml" /></V>')
+        self.write("second.xml", '<V><Include src="first.xml" /></V>')
+        with self.assertRaises(tkml.TKMLMalformedElement):
+            self.cache.get(first)
+
+    def test_include_needs_src(self):
+        main = self.write("main.xml", "<V><Include /></V>")
+        with self.assertRaises(tkml.TKMLMalformedElement):
+            self.cache.get(main)
+
+
+if __name__ == "__main__":
+    unittest.main()
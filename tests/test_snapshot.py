@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+import tkml
+
+
+def snapshot_bytes() -> bytes:
+    """A snapshot with one record of each kind, packed the way snapshot_driver does"""
+    out = bytearray(tkml._SNAPSHOT_HEADER.pack(tkml.SNAPSHOT_MAGIC, tkml.SNAPSHOT_VERSION))
+    out += tkml._U32.pack(4)
+    for key, value in (("name", "élan"), ("count", 3)):
+        out.append(tkml._RECORD_VARIABLE)
+        tkml._pack_str(out, key)
+        tkml._pack_value(out, value)
+
+    out.append(tkml._RECORD_TABLE)
+    tkml._pack_str(out, "table")
+    out += tkml._U32.pack(2)
+    for iid, text, values, lazy in (
+        ("r1", "", ("Cake", 500, 1.5, True), False),
+        ("r2", "x", (), True),
+    ):
+        tkml._pack_str(out, iid)
+        tkml._pack_str(out, text)
+        out += tkml._U32.pack(len(values))
+        for value in values:
+            tkml._pack_value(out, value)
+        out.append(lazy)
+    out.append(1)
+    tkml._pack_str(out, "calories")
+    out.append(True)
+    tkml._pack_str(out, "num")
+    out += tkml._F64.pack(0.25)
+
+    out.append(tkml._RECORD_NOTEBOOK)
+    tkml._pack_str(out, "tabs")
+    out += tkml._U32.pack(2)
+    return bytes(out)
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        file_, self.path = tempfile.mkstemp()
+        os.close(file_)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def read(self, data: bytes) -> list:
+        with open(self.path, "wb") as file_:
+            file_.write(data)
+        with open(self.path, "rb") as file_:
+            return tkml._read_snapshot(self.path, memoryview(file_.read()))
+
+    def test_round_trip(self):
+        self.assertEqual(
+            self.read(snapshot_bytes()),
+            [
+                (tkml._RECORD_VARIABLE, "name", "élan"),
+                (tkml._RECORD_VARIABLE, "count", 3),
+                (
+                    tkml._RECORD_TABLE,
+                    "table",
+                    (
+                        [
+                            ("r1", "", ("Cake", 500, 1.5, True), False),
+                            ("r2", "x", (), True),
+                        ],
+                        ("calories", True, "num"),
+                        0.25,
+                    ),
+                ),
+                (tkml._RECORD_NOTEBOOK, "tabs", 2),
+            ],
+        )
+
+    def test_truncated(self):
+        data = snapshot_bytes()
+        for end in range(len(data)):
+            with open(self.path, "wb") as file_:
+                file_.write(data[:end])
+            # Nothing is applied to the driver before the whole file is read
+            with self.assertRaises(tkml.TKMLRuntimeError):
+                tkml.restore_driver(None, self.path)
+
+    def test_damaged(self):
+        data = snapshot_bytes()
+        unknown_value = bytearray(data[: tkml._SNAPSHOT_HEADER.size])
+        unknown_value += tkml._U32.pack(1)
+        unknown_value.append(tkml._RECORD_VARIABLE)
+        tkml._pack_str(unknown_value, "name")
+        unknown_value.append(0xFF)
+        for damaged in (
+            data + b"\x00",
+            b"NOTASNAP" + data[8:],
+            data[:8] + bytes([tkml.SNAPSHOT_VERSION + 1]) + data[9:],
+            bytes(unknown_value),
+        ):
+            with self.assertRaises(tkml.TKMLRuntimeError):
+                self.read(damaged)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,11 +7,27 @@ __author__ = "Randy Graham"
 
 import tkinter as tk
 import tkinter.ttk as ttk
+import tkinter.font as tkfont
 from functools import partial
 import xml.etree.ElementTree as xmlET
+from xml.parsers import expat
 import datetime
 import uuid
+import re
+import os
+import time
+import mmap
+import struct
+import json
+import copy
+import heapq
+import weakref
 from math import inf
+from collections import OrderedDict, deque
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain
+from array import array
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 DEBUG = False
 
@@ -170,6 +186,10 @@ class CreateToolTip(object):
         if tw:
             tw.destroy()
 
+    def dispose(self):
+        self.leave()
+        self.widget = None
+
 """
 This Sortable treeview class was made by Remi Hassan
 https://stackoverflow.com/users/6424190/rami-hassan
@@ -178,6 +198,13 @@ https://stackoverflow.com/a/63432251
 
 
 class SortableTreeview(ttk.Treeview):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Every top level row in display order while a filter hides some of them
+        self._all_rows = None
+        # (column, reverse, sort_by) of the last heading sort
+        self._sort_state = None
+
     def heading(self, column, sort_by=None, **kwargs):
         if sort_by and not hasattr(kwargs, "command"):
             func = getattr(self, f"_sort_by_{sort_by}", None)
@@ -186,10 +213,18 @@ class SortableTreeview(ttk.Treeview):
         return super().heading(column, **kwargs)
 
     def _sort(self, column, reverse, data_type, callback):
-        list_ = [(self.set(k, column), k) for k in self.get_children("")]
+        rows = self.get_children("") if self._all_rows is None else self._all_rows
+        list_ = [(self.set(k, column), k) for k in rows]
         list_.sort(key=lambda t: data_type(t[0]), reverse=reverse)
-        for index, (_, k) in enumerate(list_):
-            self.move(k, "", index)
+        rows = [k for _, k in list_]
+        if self._all_rows is None:
+            self.set_children("", *rows)
+        else:
+            # Hidden rows are sorted too so clearing the filter keeps the order
+            self._all_rows = rows
+            visible = set(self.get_children(""))
+            self.set_children("", *[k for k in rows if k in visible])
+        self._sort_state = (column, reverse, callback.__name__[len("_sort_by_") :])
         self.heading(column, command=partial(callback, column, not reverse))
 
     def _sort_by_num(self, column, reverse):
@@ -205,12 +240,260 @@ class SortableTreeview(ttk.Treeview):
         self._sort(column, reverse, _str_to_datetime, self._sort_by_date)
 
 
+def _parse_number_term(term: str) -> tuple | None:
+    """Convert a search term like "5", ">=5" or "5..10" to (low, high, low_inclusive, high_inclusive)
+
+    Returns None if the term isn't numeric
+    """
+    try:
+        if ".." in term:
+            low, high = term.split("..", 1)
+            return (float(low), float(high), True, True)
+        for operator, bounds in (
+            (">=", lambda n: (n, inf, True, True)),
+            ("<=", lambda n: (-inf, n, True, True)),
+            (">", lambda n: (n, inf, False, True)),
+            ("<", lambda n: (-inf, n, True, False)),
+            ("=", lambda n: (n, n, True, True)),
+            ("", lambda n: (n, n, True, True)),
+        ):
+            if term.startswith(operator):
+                return bounds(float(term[len(operator) :]))
+    except ValueError:
+        return None
+
+
+class TableIndex:
+    """Search index over one column of a Treeview's top level rows
+
+    Text columns are split into lowercase words kept in one sorted list, so
+    every word starting with a prefix is found with a binary search. When
+    every value in the column is a number the values are kept sorted instead
+    and answer exact and range terms like "5", ">=5" or "5..10".
+    """
+
+    def __init__(self, rows: list, values: list):
+        self.numeric = bool(values)
+        numbers = []
+        for value in values:
+            number = _parse_number_term(str(value))
+            if number is None or number[0] != number[1]:
+                self.numeric = False
+                break
+            numbers.append(number[0])
+
+        if self.numeric:
+            self._row_keys = dict(zip(rows, numbers))
+            pairs = sorted(zip(numbers, rows))
+        else:
+            self._row_keys = {
+                row: self._tokenize(value) for row, value in zip(rows, values)
+            }
+            pairs = sorted(
+                (token, row)
+                for row, tokens in self._row_keys.items()
+                for token in tokens
+            )
+        self._keys = [key for key, _ in pairs]
+        self._rows = [row for _, row in pairs]
+
+    @staticmethod
+    def _tokenize(value) -> list:
+        return re.findall(r"\w+", str(value).lower())
+
+    def add(self, row, value):
+        if self.numeric:
+            number = _parse_number_term(str(value))
+            if number is None or number[0] != number[1]:
+                # A non number can't go in a numeric index, it is left unindexed
+                return
+            self._row_keys[row] = number[0]
+            keys = [number[0]]
+        else:
+            keys = self._row_keys[row] = self._tokenize(value)
+        for key in keys:
+            position = bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._rows.insert(position, row)
+
+    def remove(self, rows):
+        """Forget rows, rows which were never indexed are ignored"""
+        for row in rows:
+            if row not in self._row_keys:
+                continue
+            keys = self._row_keys.pop(row)
+            for key in set([keys] if self.numeric else keys):
+                start = bisect_left(self._keys, key)
+                end = bisect_right(self._keys, key)
+                # Backwards so deleting doesn't move the positions left to check
+                for position in range(end - 1, start - 1, -1):
+                    if self._rows[position] == row:
+                        del self._keys[position]
+                        del self._rows[position]
+
+    def _range(self, term: str) -> list:
+        """Return (low, high) positions into the sorted keys for each part of term"""
+        if self.numeric:
+            number = _parse_number_term(term)
+            if number is None:
+                return [(0, 0)]
+            low, high, low_inclusive, high_inclusive = number
+            start = (bisect_left if low_inclusive else bisect_right)(self._keys, low)
+            end = (bisect_right if high_inclusive else bisect_left)(self._keys, high)
+            return [(start, end)]
+        number = _parse_number_term(term)
+        if number is not None and number[0] != number[1]:
+            # Comparisons only apply to numeric columns
+            return [(0, 0)]
+        return [
+            (
+                bisect_left(self._keys, word),
+                bisect_right(self._keys, word + "\U0010ffff"),
+            )
+            for word in self._tokenize(term)
+        ] or [(0, 0)]
+
+    def count(self, term: str) -> int:
+        """Upper bound of how many rows lookup(term) would return"""
+        return min(end - start for start, end in self._range(term))
+
+    def lookup(self, term: str) -> set:
+        matches = None
+        for start, end in self._range(term):
+            found = set(self._rows[start:end])
+            matches = found if matches is None else matches & found
+        return matches
+
+    def match(self, row, term: str) -> bool:
+        if row not in self._row_keys:
+            return False
+        key = self._row_keys[row]
+        if self.numeric:
+            number = _parse_number_term(term)
+            if number is None:
+                return False
+            low, high, low_inclusive, high_inclusive = number
+            return (low <= key if low_inclusive else low < key) and (
+                key <= high if high_inclusive else key < high
+            )
+        number = _parse_number_term(term)
+        if number is not None and number[0] != number[1]:
+            return False
+        words = self._tokenize(term)
+        return bool(words) and all(
+            any(token.startswith(word) for token in key) for word in words
+        )
+
+
+class PrefixIndex:
+    """A sorted, lowercased copy of a list of values for fast prefix lookups
+
+    Call rebuild() after changing the list in place
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.rebuild()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def rebuild(self):
+        pairs = sorted((str(value).lower(), str(value)) for value in self.values)
+        self._keys = [key for key, _ in pairs]
+        self._values = [value for _, value in pairs]
+
+    def lookup(self, prefix: str, limit: int) -> list:
+        """Return at most limit values starting with prefix, ignoring case"""
+        prefix = prefix.lower()
+        start = bisect_left(self._keys, prefix)
+        matches = []
+        for position in range(start, min(start + limit, len(self._keys))):
+            if not self._keys[position].startswith(prefix):
+                break
+            matches.append(self._values[position])
+        return matches
+
+
+# Every PrefixIndex still in use, an index keeps its list alive so the
+# list's id can't be reused while the entry exists
+_prefix_indexes = weakref.WeakValueDictionary()
+# The most recently used indexes are kept even when no widget uses them
+_recent_prefix_indexes = OrderedDict()
+recent_prefix_index_count = 16
+
+
+def _prefix_index_key(values):
+    return values if isinstance(values, tuple) else id(values)
+
+
+def get_prefix_index(values) -> PrefixIndex:
+    """Return the shared PrefixIndex for values, building it on first use
+
+    Lists are matched by identity so every widget using the same driver list
+    shares one index, which is rebuilt if the list changes length. Tuples
+    (eg. inline values) are matched by contents. Lists changed in place
+    without changing length need invalidate_prefix_index.
+    """
+    key = _prefix_index_key(values)
+    index = _prefix_indexes.get(key)
+    if index is None:
+        index = _prefix_indexes[key] = PrefixIndex(values)
+    elif len(index) != len(values):
+        index.rebuild()
+    _recent_prefix_indexes[key] = index
+    _recent_prefix_indexes.move_to_end(key)
+    while len(_recent_prefix_indexes) > recent_prefix_index_count:
+        _recent_prefix_indexes.popitem(last=False)
+    return index
+
+
+def invalidate_prefix_index(values):
+    """Rebuild the index of a list which was changed in place
+
+    Every AutoCombobox using the list sees the new values on its next key press
+    """
+    index = _prefix_indexes.get(_prefix_index_key(values))
+    if index is not None:
+        index.rebuild()
+
+
+class AutoCombobox(ttk.Combobox):
+    """A Combobox which only lists the values starting with what has been typed
+
+    Values come from a shared PrefixIndex so very long lists are neither
+    copied into the widget nor scanned on every key press.
+    """
+
+    def __init__(self, parent, prefix_index: PrefixIndex, max_results=50, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.prefix_index = prefix_index
+        self.max_results = max_results
+        self["values"] = prefix_index.lookup("", max_results)
+        self.bind("<KeyRelease>", self._on_key, add="+")
+
+    def _on_key(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        self["values"] = self.prefix_index.lookup(self.get(), self.max_results)
+
+
 class TKMLTreeView(ttk.Frame):
     """A ttk Treeview based on Remi Hassan's SortableTreeview with automatic resizing and scrollbars"""
 
     def __init__(self, parent, **kwargs):
         super().__init__(parent)
 
+        # Search indexes by column, built the first time a column is filtered
+        self._indexes = {}
+        # (query, columns, matches) of the last filter for narrowing
+        self._last_filter = None
+        # Set by enable_lazy_children
+        self._lazy_loader = None
+        self._lazy_loading = set()
+        self._lazy_unloads = {}
+        # after ids of offloaded loads waiting for their worker, by row
+        self._lazy_polls = {}
         self.treeview = SortableTreeview(self, **kwargs)
 
         self.v_scrollbar = ttk.Scrollbar(
@@ -232,6 +515,241 @@ class TKMLTreeView(ttk.Frame):
     def bind(self, *args, **kwargs):
         self.treeview.bind(*args, **kwargs)
 
+    def insert(self, parent, index, iid=None, **kwargs):
+        item = self.treeview.insert(parent, index, iid, **kwargs)
+        if parent != "":
+            return item
+        self._last_filter = None
+        all_rows = self.treeview._all_rows
+        if all_rows is not None:
+            # Keep the new row next to the visible row it was inserted before
+            visible = self.treeview.get_children("")
+            position = visible.index(item)
+            if position + 1 < len(visible):
+                all_rows.insert(all_rows.index(visible[position + 1]), item)
+            else:
+                all_rows.append(item)
+        if self._indexes:
+            values = self.treeview.set(item)
+            for column, index_ in self._indexes.items():
+                index_.add(item, values.get(column, ""))
+        return item
+
+    def insert_many(self, rows, parent="") -> list:
+        """Append (iid, text, values) rows to parent in one batch
+
+        Skips the option handling insert does for every row, which makes
+        refilling big tables much faster. iid may be None to let ttk pick one.
+        """
+        call = self.treeview.tk.call
+        widget = self.treeview._w
+        items = []
+        for iid, text, values in rows:
+            options = ("-text", text, "-values", values)
+            if iid is not None:
+                options = ("-id", iid) + options
+            items.append(call(widget, "insert", parent, "end", *options))
+        if parent == "" and items:
+            self.invalidate_index()
+            if self.treeview._all_rows is not None:
+                self.treeview._all_rows.extend(items)
+        return items
+
+    def delete(self, *items):
+        self.treeview.delete(*items)
+        self._last_filter = None
+        deleted = set(items)
+        for index_ in self._indexes.values():
+            index_.remove(deleted)
+        if self.treeview._all_rows is not None:
+            self.treeview._all_rows = [
+                row for row in self.treeview._all_rows if row not in deleted
+            ]
+
+    def enable_lazy_children(
+        self, loader: callable, offload: bool = False, unload: int | None = None
+    ):
+        """Load the children of rows inserted with insert_lazy when they are opened
+
+        loader is called with the iid of the opened row and returns a list of
+        insert keyword dicts, one per child. A dict with "lazy": True makes
+        that child lazy too. If offload is set the loader runs on a worker
+        thread and must not touch tk. If unload is given, children of a row
+        which stays closed for that many milliseconds are removed again.
+        """
+        self._lazy_loader = loader
+        self._lazy_offload = offload
+        self._lazy_unload = unload
+        self.treeview.bind("<<TreeviewOpen>>", self._lazy_open, add="+")
+        self.treeview.bind("<<TreeviewClose>>", self._lazy_close, add="+")
+
+    def insert_lazy(self, parent, index, iid=None, **kwargs):
+        """Insert a row whose children are loaded the first time it is opened"""
+        item = self.insert(parent, index, iid, **kwargs)
+        self._add_placeholder(item)
+        return item
+
+    @staticmethod
+    def _placeholder(item) -> str:
+        return f"{item}.tkml-placeholder"
+
+    def _add_placeholder(self, item):
+        # Gives the row an open indicator before its children exist
+        self.treeview.insert(
+            item, "end", iid=self._placeholder(item), text="Loading..."
+        )
+
+    def _lazy_open(self, event=None):
+        item = self.treeview.focus()
+        if item in self._lazy_unloads:
+            self.after_cancel(self._lazy_unloads.pop(item))
+        if item in self._lazy_loading or self.treeview.get_children(item) != (
+            self._placeholder(item),
+        ):
+            return
+        self._lazy_loading.add(item)
+        if not self._lazy_offload:
+            self._lazy_insert(item, self._lazy_loader(item))
+            return
+
+        future = get_executor("thread").submit(self._lazy_loader, item)
+
+        def _finish():
+            del self._lazy_polls[item]
+            if not future.done():
+                self._lazy_polls[item] = self.after(20, _finish)
+                return
+            try:
+                children = future.result()
+            except Exception:
+                self._lazy_loading.discard(item)
+                raise
+            self._lazy_insert(item, children)
+
+        self._lazy_polls[item] = self.after(20, _finish)
+
+    def _lazy_insert(self, item, children):
+        self._lazy_loading.discard(item)
+        if not self.treeview.exists(item):
+            return
+        self.treeview.delete(self._placeholder(item))
+        for child in children:
+            child = dict(child)
+            if child.pop("lazy", False):
+                self.insert_lazy(item, "end", **child)
+            else:
+                self.insert(item, "end", **child)
+
+    def _lazy_close(self, event=None):
+        item = self.treeview.focus()
+        if self._lazy_unload is None or item in self._lazy_unloads:
+            return
+        self._lazy_unloads[item] = self.after(
+            self._lazy_unload, partial(self._lazy_unload_children, item)
+        )
+
+    def _lazy_unload_children(self, item):
+        self._lazy_unloads.pop(item, None)
+        if not self.treeview.exists(item):
+            return
+        if self.treeview.item(item, "open") or item in self._lazy_loading:
+            return
+        # Cancel pending unloads of descendants which are about to disappear
+        for pending in list(self._lazy_unloads):
+            if not self.treeview.exists(pending) or self._is_descendant(pending, item):
+                self.after_cancel(self._lazy_unloads.pop(pending))
+        self.treeview.delete(*self.treeview.get_children(item))
+        self._add_placeholder(item)
+
+    def _is_descendant(self, item, ancestor) -> bool:
+        parent = self.treeview.parent(item)
+        while parent != "":
+            if parent == ancestor:
+                return True
+            parent = self.treeview.parent(parent)
+        return False
+
+    def destroy(self):
+        # tkinter deletes the callbacks of pending timers along with the
+        # widget, so a timer left running fires into a missing command
+        for id_ in chain(self._lazy_unloads.values(), self._lazy_polls.values()):
+            self.after_cancel(id_)
+        self._lazy_unloads.clear()
+        self._lazy_polls.clear()
+        super().destroy()
+
+    def invalidate_index(self):
+        """Throw away the search indexes, call this after editing row values"""
+        self._indexes = {}
+        self._last_filter = None
+
+    def filter(self, query: str, columns: list | None = None):
+        """Only show the top level rows matching every word in query
+
+        A word matches a row when it is the start of a word in any of the
+        given columns, or when a numeric column satisfies it (eg. "5",
+        ">=5", "<5", "5..10"). Hidden rows are detached rather than deleted
+        so sorting and selection survive. Typing more characters narrows the
+        previous result instead of searching from scratch. An empty query
+        shows every row again.
+        """
+        treeview = self.treeview
+        columns = list(columns or treeview["columns"])
+        terms = query.lower().split()
+        if not terms:
+            if treeview._all_rows is not None:
+                treeview.set_children("", *treeview._all_rows)
+                treeview._all_rows = None
+            self._last_filter = None
+            return
+
+        if treeview._all_rows is None:
+            treeview._all_rows = list(treeview.get_children(""))
+        self._build_indexes(columns)
+        indexes = [self._indexes[column] for column in columns]
+
+        matches = None
+        previous = self._last_filter
+        if (
+            previous is not None
+            and previous[1] == columns
+            and query.lower().startswith(previous[0])
+            # Numeric ranges don't shrink as the term gets longer
+            and not any(_parse_number_term(term) for term in terms)
+        ):
+            matches = previous[2]
+
+        for term in terms:
+            if matches is not None and len(matches) < sum(
+                index_.count(term) for index_ in indexes
+            ):
+                # Checking the remaining rows is cheaper than a lookup
+                matches = {
+                    row
+                    for row in matches
+                    if any(index_.match(row, term) for index_ in indexes)
+                }
+            else:
+                found = set().union(*(index_.lookup(term) for index_ in indexes))
+                matches = found if matches is None else matches & found
+
+        self._last_filter = (query.lower(), columns, matches)
+        # One call detaches every hidden row and reattaches every shown row
+        treeview.set_children(
+            "", *[row for row in treeview._all_rows if row in matches]
+        )
+
+    def _build_indexes(self, columns: list):
+        missing = [column for column in columns if column not in self._indexes]
+        if not missing:
+            return
+        rows = self.treeview._all_rows or list(self.treeview.get_children(""))
+        values = [self.treeview.set(row) for row in rows]
+        for column in missing:
+            self._indexes[column] = TableIndex(
+                rows, [row_values.get(column, "") for row_values in values]
+            )
+
     def __getattr__(self, name):
         # Pass all calls to the treeview
         if name == "treeview":
@@ -241,6 +759,554 @@ class TKMLTreeView(ttk.Frame):
             return getattr(self.treeview, name)
 
 
+class TKMLCellGrid(ttk.Frame):
+    """A grid of text cells drawn on one Canvas instead of one widget per cell
+
+    Cells are created as canvas items a batch at a time from after_idle so
+    the window stays responsive while a large grid draws. set_cell only
+    redraws the cells which changed, once per idle.
+    """
+
+    def __init__(
+        self,
+        parent,
+        rows: int,
+        cols: int,
+        cell_width: int = 60,
+        cell_height: int = 24,
+        on_click: callable = None,
+        cell_fill: str = "white",
+        outline: str = "#d0d0d0",
+        font=None,
+        batch: int = 2000,
+        **kwargs,
+    ):
+        super().__init__(parent)
+        self.rows = rows
+        self.cols = cols
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.on_click = on_click
+        # Not called fill, that is a layout param
+        self.default_fill = cell_fill
+        self.outline = outline
+        self.font = font
+        self.batch = batch
+
+        self._text = [""] * (rows * cols)
+        self._fill = [cell_fill] * (rows * cols)
+        # Canvas item ids by cell, filled in as batches are drawn
+        self._rect_ids = array("L")
+        self._text_ids = array("L")
+        self._dirty = set()
+        self._draw_id = None
+        self._flush_id = None
+
+        self.canvas = tk.Canvas(self, highlightthickness=0, **kwargs)
+        self.v_scrollbar = ttk.Scrollbar(
+            self, orient="vertical", command=self.canvas.yview
+        )
+        self.h_scrollbar = ttk.Scrollbar(
+            self, orient="horizontal", command=self.canvas.xview
+        )
+        self.canvas.configure(
+            yscrollcommand=self.v_scrollbar.set,
+            xscrollcommand=self.h_scrollbar.set,
+            scrollregion=(0, 0, cols * cell_width, rows * cell_height),
+        )
+        self.v_scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(expand=1, fill="both")
+        self.h_scrollbar.pack(fill="x")
+
+        self.canvas.bind("<Button-1>", self._on_click)
+        self._draw_id = self.after_idle(self._draw_batch)
+
+    def set_cell(self, row: int, col: int, text=None, fill: str | None = None):
+        """Change a cell's text and/or colour, the canvas is updated when idle"""
+        cell = row * self.cols + col
+        if text is not None:
+            self._text[cell] = str(text)
+        if fill is not None:
+            self._fill[cell] = fill
+        if cell < len(self._rect_ids):
+            # Cells which aren't drawn yet pick up the change when they are
+            self._dirty.add(cell)
+            if self._flush_id is None:
+                self._flush_id = self.after_idle(self._flush)
+
+    def get_cell(self, row: int, col: int) -> tuple:
+        cell = row * self.cols + col
+        return self._text[cell], self._fill[cell]
+
+    def set_matrix(self, matrix: list):
+        """Set every cell from a list of rows
+
+        Each value is either the cell's text or a (text, fill) tuple
+        """
+        for row, values in enumerate(matrix[: self.rows]):
+            for col, value in enumerate(values[: self.cols]):
+                if isinstance(value, tuple):
+                    text, fill = value
+                else:
+                    text, fill = value, None
+                cell = row * self.cols + col
+                if str(text) != self._text[cell] or (
+                    fill is not None and fill != self._fill[cell]
+                ):
+                    self.set_cell(row, col, text, fill)
+
+    def _draw_batch(self):
+        self._draw_id = None
+        start = len(self._rect_ids)
+        end = min(start + self.batch, self.rows * self.cols)
+        for cell in range(start, end):
+            row, col = divmod(cell, self.cols)
+            x = col * self.cell_width
+            y = row * self.cell_height
+            self._rect_ids.append(
+                self.canvas.create_rectangle(
+                    x,
+                    y,
+                    x + self.cell_width,
+                    y + self.cell_height,
+                    fill=self._fill[cell],
+                    outline=self.outline,
+                )
+            )
+            self._text_ids.append(
+                self.canvas.create_text(
+                    x + self.cell_width // 2,
+                    y + self.cell_height // 2,
+                    text=self._text[cell],
+                    font=self.font,
+                )
+            )
+        if end < self.rows * self.cols:
+            self._draw_id = self.after_idle(self._draw_batch)
+
+    def _flush(self):
+        self._flush_id = None
+        dirty = self._dirty
+        self._dirty = set()
+        for cell in dirty:
+            self.canvas.itemconfigure(self._rect_ids[cell], fill=self._fill[cell])
+            self.canvas.itemconfigure(self._text_ids[cell], text=self._text[cell])
+
+    def _on_click(self, event):
+        col = int(self.canvas.canvasx(event.x)) // self.cell_width
+        row = int(self.canvas.canvasy(event.y)) // self.cell_height
+        if self.on_click is not None and 0 <= row < self.rows and 0 <= col < self.cols:
+            self.on_click(row, col)
+
+    def destroy(self):
+        for id_ in (self._draw_id, self._flush_id):
+            if id_ is not None:
+                self.after_cancel(id_)
+        super().destroy()
+
+
+class LineIndex:
+    """Where lines start in a file which is only ever appended to
+
+    Only every stride-th line start is kept, the rest are found by searching
+    forward from the nearest kept one. scan() runs on a worker thread, the
+    offsets array is only ever appended to so the Tk thread can read it.
+    scan() reads the file rather than mapping it, a mapping of a file which
+    is truncated while it is read kills the process with SIGBUS.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, filepath: str, stride: int = 64):
+        self.filepath = filepath
+        self.stride = stride
+        self.offsets = array("Q", [0])
+        # Number of line starts found, including the first line
+        self.lines = 1
+        self.last_start = 0
+        self.scanned = 0
+
+    def scan(self, end: int):
+        """Index the file up to byte end"""
+        if end <= self.scanned:
+            return
+        with open(self.filepath, "rb") as file:
+            position = self.scanned
+            file.seek(position)
+            while position < end:
+                chunk = file.read(min(self.chunk_size, end - position))
+                if not chunk:
+                    # Truncated while scanning, the view starts a new index
+                    break
+                pieces = chunk.split(b"\n")
+                # Every newline in the chunk starts a new line just after it
+                starts = list(
+                    accumulate(
+                        (len(piece) + 1 for piece in pieces[:-1]),
+                        initial=position,
+                    )
+                )[1:]
+                if starts:
+                    first_kept = -self.lines % self.stride
+                    self.offsets.extend(starts[first_kept :: self.stride])
+                    self.lines += len(starts)
+                    self.last_start = starts[-1]
+                position += len(chunk)
+                self.scanned = position
+
+    def line_count(self) -> int:
+        # A file ending in a newline doesn't have a line after it yet
+        if self.last_start == self.scanned and self.lines > 1:
+            return self.lines - 1
+        return self.lines
+
+    def line_start(self, mapped: mmap.mmap, line: int) -> int:
+        position = self.offsets[line // self.stride]
+        for _ in range(line % self.stride):
+            position = mapped.find(b"\n", position) + 1
+        return position
+
+
+class TKMLLogView(ttk.Frame):
+    """Shows a file of any size by memory mapping it and drawing only visible lines
+
+    The line index is built on a worker thread, so the start of the file can
+    be browsed while the rest is still being indexed. With follow set the
+    file is checked for new data every poll milliseconds and the view stays
+    at the end while it is scrolled to the bottom.
+    """
+
+    max_line_length = 4096
+
+    def __init__(self, parent, path: str, follow=False, poll: int = 500, **kwargs):
+        super().__init__(parent)
+        self.path = path
+        self.follow = bool(follow)
+        self.poll = poll
+        self.first = 0
+        self._index = LineIndex(path)
+        self._mapped = None
+        self._size = 0
+        # (st_dev, st_ino) of the mapped file, to notice rotation
+        self._inode = None
+        self._scan = None
+        self._poll_id = None
+        # Set when the file grew while the view was at its end, the view
+        # moves to the end again each time a scan of the new data finishes
+        self._follow_end = False
+        self._linespace = None
+
+        kwargs.setdefault("wrap", "none")
+        self.text = tk.Text(self, **kwargs)
+        self.v_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.h_scrollbar = ttk.Scrollbar(
+            self, orient="horizontal", command=self.text.xview
+        )
+        self.text.configure(xscrollcommand=self.h_scrollbar.set, state="disabled")
+        self.v_scrollbar.pack(side="right", fill="y")
+        self.text.pack(expand=1, fill="both")
+        self.h_scrollbar.pack(fill="x")
+
+        # The Text widget only ever holds one screen, so scrolling it is ours
+        for sequence, amount in (
+            ("<MouseWheel>", None),
+            ("<Button-4>", -3),
+            ("<Button-5>", 3),
+            ("<Prior>", "page_up"),
+            ("<Next>", "page_down"),
+            ("<Up>", -1),
+            ("<Down>", 1),
+            ("<Control-Home>", "home"),
+            ("<Control-End>", "end"),
+        ):
+            self.text.bind(sequence, partial(self._on_key, amount))
+        self.text.bind("<Configure>", self._on_configure)
+        self._check_file()
+
+    def line_count(self) -> int:
+        return self._index.line_count()
+
+    def visible_lines(self) -> int:
+        if self._linespace is None:
+            self._linespace = tkfont.Font(font=self.text["font"]).metrics(
+                "linespace"
+            )
+        return max(1, self.text.winfo_height() // self._linespace)
+
+    def goto_line(self, line: int):
+        last = max(0, self.line_count() - self.visible_lines())
+        self.first = min(max(0, line), last)
+        self._render()
+
+    def see_end(self):
+        self.goto_line(self.line_count())
+
+    def at_end(self) -> bool:
+        return self.first + self.visible_lines() >= self.line_count()
+
+    def yview(self, *args):
+        self._follow_end = False
+        if args[0] == "moveto":
+            self.goto_line(int(float(args[1]) * self.line_count()))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_lines()
+            self.goto_line(self.first + amount)
+
+    def _on_key(self, amount, event):
+        self._follow_end = False
+        if amount is None:
+            amount = -3 if event.delta > 0 else 3
+        if amount == "page_up":
+            amount = -self.visible_lines()
+        elif amount == "page_down":
+            amount = self.visible_lines()
+        elif amount == "home":
+            amount = -self.first
+        elif amount == "end":
+            amount = self.line_count()
+        self.goto_line(self.first + amount)
+        return "break"
+
+    def _sync(self) -> int:
+        """Remap the file if it changed size or was replaced and return its size
+
+        Reading a mapping past the end of a file which has been truncated
+        since, eg. by logrotate's copytruncate, kills the process with
+        SIGBUS, so this runs before every read from the mapping.
+        """
+        try:
+            stat = os.stat(self.path)
+            size, inode = stat.st_size, (stat.st_dev, stat.st_ino)
+        except FileNotFoundError:
+            # Rotated and not created again yet
+            size, inode = 0, None
+        if size < self._size or inode != self._inode:
+            # The file was truncated or rotated, start again
+            self._index = LineIndex(self.path)
+            self._scan = None
+            self.first = 0
+            self._unmap()
+        self._inode = inode
+        if size != self._size:
+            was_at_end = self.at_end()
+            self._unmap()
+            self._size = size
+            if size > 0:
+                with open(self.path, "rb") as file:
+                    self._mapped = mmap.mmap(
+                        file.fileno(), size, access=mmap.ACCESS_READ
+                    )
+            if self.follow and was_at_end:
+                self._follow_end = True
+        if self._follow_end:
+            # Like see_end, the caller renders
+            self.first = max(0, self.line_count() - self.visible_lines())
+        return size
+
+    def _on_configure(self, event):
+        # The font may have changed along with the size
+        self._linespace = None
+        self._render()
+
+    def _unmap(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        self._size = 0
+
+    def _check_file(self):
+        self._poll_id = None
+        if not self.winfo_exists():
+            return
+        size = self._sync()
+
+        if (self._scan is None or self._scan.done()) and self._index.scanned < size:
+            self._scan = get_executor("thread").submit(self._index.scan, size)
+        scanning = self._scan is not None and not self._scan.done()
+        if self._follow_end and not scanning:
+            # The new data is indexed now, so line_count() is the real end
+            self.first = max(0, self.line_count() - self.visible_lines())
+            self._follow_end = False
+        self._render()
+        if self.follow or scanning:
+            self._poll_id = self.after(
+                100 if scanning else self.poll, self._check_file
+            )
+
+    def _render(self):
+        self._sync()
+        count = self.line_count()
+        visible = self.visible_lines()
+        lines = []
+        if self._mapped is not None and self.first < count:
+            position = self._index.line_start(self._mapped, self.first)
+            for _ in range(min(visible, count - self.first)):
+                end = self._mapped.find(b"\n", position, self._size)
+                if end == -1:
+                    end = self._size
+                line = self._mapped[
+                    position : min(end, position + self.max_line_length)
+                ]
+                lines.append(line.decode("utf-8", "replace").rstrip("\r"))
+                position = end + 1
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.configure(state="disabled")
+        if count:
+            self.v_scrollbar.set(
+                self.first / count, min(1.0, (self.first + visible) / count)
+            )
+
+    def destroy(self):
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+        self._unmap()
+        super().destroy()
+
+
+class TKMLHighlighter:
+    """Applies regex highlighting rules to a Text widget, a few lines at a time
+
+    The widget's Tcl command is swapped for a proxy (the same trick as
+    idlelib's redirector) so every insert and delete marks the lines it
+    touched as dirty. Dirty lines are retagged from after_idle in slices of
+    at most budget milliseconds, visible lines first, so the cost follows
+    the size of the edit rather than the size of the document. Rules are
+    matched one line at a time.
+    """
+
+    def __init__(self, text: tk.Text, rules: list, budget: int = 8):
+        self.text = text
+        self.rules = rules
+        self.budget = budget
+        # Sorted, non overlapping (first, last) line ranges waiting to be tagged
+        self._pending = []
+        self._job = None
+
+        self._name = str(text)
+        self._original = self._name + "_tkml_original"
+        text.tk.call("rename", self._name, self._original)
+        text.tk.createcommand(self._name, self._dispatch)
+        text.bind("<Destroy>", self._on_destroy, add="+")
+        self.mark_dirty(1, self._line("end"))
+
+    def _call(self, *args):
+        return self.text.tk.call((self._original,) + args)
+
+    def _line(self, index: str) -> int:
+        return int(self._call("index", index).split(".")[0])
+
+    def _dispatch(self, *args):
+        if not args or args[0] not in ("insert", "delete", "replace"):
+            return self._call(*args)
+        operation, args = args[0], args[1:]
+
+        # Tk clamps indices past the last character to just before the final
+        # newline, so "end" is on the last line rather than the one after it
+        last = self._line("end - 1 char")
+        start = min(self._line(args[0]), last)
+        if operation == "insert":
+            end = start
+            # args are index, chars, tags, chars, tags...
+            added = sum(chars.count("\n") for chars in args[1::2])
+        else:
+            end = min(self._line(args[1]), last) if len(args) > 1 else start
+            added = sum(chars.count("\n") for chars in args[2::2])
+
+        result = self._call(operation, *args)
+        self._shift(start, added - (end - start))
+        self.mark_dirty(start, start + added)
+        return result
+
+    def _shift(self, line: int, delta: int):
+        """Move pending ranges after line to follow lines added or removed there"""
+        if delta == 0:
+            return
+        shifted = []
+        for first, last in self._pending:
+            if last <= line:
+                shifted.append((first, last))
+            elif first > line:
+                shifted.append((max(line, first + delta), max(line, last + delta)))
+            else:
+                shifted.append((first, max(line, last + delta)))
+        self._pending = []
+        for first, last in shifted:
+            self.mark_dirty(first, last, schedule=False)
+
+    def mark_dirty(self, first: int, last: int, schedule: bool = True):
+        """Queue lines first to last for retagging"""
+        merged = []
+        for range_first, range_last in self._pending:
+            if range_last + 1 < first or range_first > last + 1:
+                merged.append((range_first, range_last))
+            else:
+                first = min(first, range_first)
+                last = max(last, range_last)
+        merged.append((first, last))
+        merged.sort()
+        self._pending = merged
+        if schedule and self._job is None:
+            self._job = self.text.after_idle(self._run)
+
+    def _next_line(self, visible_first: int, visible_last: int) -> int:
+        # Lines on screen first, otherwise from the top of the document
+        position, line = 0, self._pending[0][0]
+        for index, (first, last) in enumerate(self._pending):
+            if first <= visible_last and last >= visible_first:
+                position, line = index, max(first, visible_first)
+                break
+        first, last = self._pending[position]
+        replacement = []
+        if first < line:
+            replacement.append((first, line - 1))
+        if line < last:
+            replacement.append((line + 1, last))
+        self._pending[position : position + 1] = replacement
+        return line
+
+    def _run(self):
+        self._job = None
+        deadline = time.perf_counter() + self.budget / 1000
+        visible_first = self._line("@0,0")
+        visible_last = self._line(f"@0,{self.text.winfo_height()}")
+        document_last = self._line("end")
+        while self._pending and time.perf_counter() < deadline:
+            line = self._next_line(visible_first, visible_last)
+            if line <= document_last:
+                self._highlight_line(line)
+        if self._pending:
+            self._job = self.text.after_idle(self._run)
+
+    def _highlight_line(self, line: int):
+        start = f"{line}.0"
+        content = self._call("get", start, f"{line}.end")
+        for _, tag in self.rules:
+            self._call("tag", "remove", tag, start, f"{line}.end")
+        for pattern, tag in self.rules:
+            for match in pattern.finditer(content):
+                if match.end() > match.start():
+                    self._call(
+                        "tag",
+                        "add",
+                        tag,
+                        f"{line}.{match.start()}",
+                        f"{line}.{match.end()}",
+                    )
+
+    def _on_destroy(self, event):
+        if event.widget is not self.text:
+            return
+        if self._job is not None:
+            self.text.after_cancel(self._job)
+            self._job = None
+        # Tk removes the renamed widget command, the proxy is ours to delete
+        self.text.tk.deletecommand(self._name)
+
+
 class TKMLDriver(ttk.Frame):
     """Master Widget for TKML based on ttk Frame
 
@@ -250,17 +1316,35 @@ class TKMLDriver(ttk.Frame):
     def __init__(self, parent, **kwargs):
         super().__init__(parent)
         self._tkml_variables = kwargs
+        self._tkml_resources = new_resources()
+        self._tkml_monitor = None
         self._widget_tree = None
-        self.on_init = []
+        # on_init is kept as an alias for older code
+        self._on_init = self.on_init = []
 
     def _tkml_init(self):
-        for i in self.on_init:
+        for i in self._on_init:
             i()
-        self.on_init.clear()
+        self._on_init.clear()
 
     def __getitem__(self, key):
         return self._tkml_variables[key]
 
+    def dispose(self):
+        """Destroy the driver and free everything the builder created for it"""
+        self.destroy()
+
+    def snapshot(self, path: str):
+        """Save variables, table rows and notebook tabs to path, see snapshot_driver"""
+        snapshot_driver(self, path)
+
+    def restore(self, path: str):
+        """Load a file written by snapshot, see restore_driver"""
+        restore_driver(self, path)
+
+    def destroy(self):
+        dispose_driver(self, super().destroy)
+
 
 class TKMLTopLevelDriver(tk.Toplevel):
     """Master Widget for TKML based on ttk Toplevel
@@ -271,8 +1355,13 @@ class TKMLTopLevelDriver(tk.Toplevel):
     def __init__(self, **kwargs):
         super().__init__()
         self._tkml_variables = kwargs
+        self._tkml_resources = new_resources()
+        self._tkml_monitor = None
+        self._tkml_pool = None
         self._widget_tree = None
         self._on_init = []
+        # Closing from the window manager should free resources too
+        self.protocol("WM_DELETE_WINDOW", self.close)
 
     def __getitem__(self, key):
         return self._tkml_variables[key]
@@ -281,27 +1370,781 @@ class TKMLTopLevelDriver(tk.Toplevel):
         for i in self._on_init:
             i()
 
+    def dispose(self):
+        """Destroy the window and free everything the builder created for it"""
+        self.destroy()
+
+    def snapshot(self, path: str):
+        """Save variables, table rows and notebook tabs to path, see snapshot_driver"""
+        snapshot_driver(self, path)
+
+    def restore(self, path: str):
+        """Load a file written by snapshot, see restore_driver"""
+        restore_driver(self, path)
+
+    def destroy(self):
+        dispose_driver(self, super().destroy)
+
     def close(self):
         if "_tkml_on_close" in self._tkml_variables:
             self["_tkml_on_close"]()
-        self.destroy()
+        if self._tkml_pool is not None:
+            # Pooled windows are hidden and kept for the next open
+            self._tkml_pool.release(self)
+            return
+        self.dispose()
         self.update()
 
 
-def make_call(master: TKMLDriver, function_name: str) -> callable:
-    def _call():
+class TKMLMonitor:
+    """Opt-in record of how long callbacks block the Tk thread for a driver
+
+    A heartbeat timer measures how late the event loop runs it (the lag).
+    Commands, virtual methods, Bind handlers and timers created by the
+    builder report their duration, and the capacity slowest are kept along
+    with the element and line they came from. Callbacks slower than
+    threshold milliseconds are also kept in a ring buffer of recent ones.
+    """
+
+    def __init__(
+        self,
+        master: TKMLDriver,
+        heartbeat: int = 50,
+        capacity: int = 100,
+        threshold: float = 16,
+    ):
+        self.master = master
+        self.heartbeat = heartbeat
+        self.capacity = capacity
+        self.threshold = threshold
+        self.lag = deque(maxlen=capacity * 10)
+        self.recent = deque(maxlen=capacity)
+        self.calls = 0
+        # Min heap of (duration, sequence, record) holding the slowest calls
+        self._slowest = []
+        self._expected = None
+        self._job = None
+
+    def start(self):
+        self.master._tkml_monitor = self
+        self._expected = time.perf_counter() + self.heartbeat / 1000
+        self._job = self.master.after(self.heartbeat, self._beat)
+        return self
+
+    def stop(self):
+        if getattr(self.master, "_tkml_monitor", None) is self:
+            self.master._tkml_monitor = None
+        if self._job is not None:
+            self.master.after_cancel(self._job)
+            self._job = None
+
+    def _beat(self):
+        self._job = None
+        if not self.master.winfo_exists():
+            return
+        now = time.perf_counter()
+        self.lag.append(max(0.0, (now - self._expected) * 1000))
+        self._expected = now + self.heartbeat / 1000
+        self._job = self.master.after(self.heartbeat, self._beat)
+
+    def record(self, kind: str, name: str, source: str | None, duration: float):
+        """Record a callback which took duration seconds"""
+        self.calls += 1
+        entry = {
+            "kind": kind,
+            "name": name,
+            "source": source,
+            "duration_ms": duration * 1000,
+            "time": time.time(),
+        }
+        item = (duration, self.calls, entry)
+        if len(self._slowest) < self.capacity:
+            heapq.heappush(self._slowest, item)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+        if entry["duration_ms"] >= self.threshold:
+            self.recent.append(entry)
+
+    def slowest(self, count: int | None = None) -> list:
+        """Return the slowest callbacks seen so far, slowest first"""
+        entries = [entry for _, _, entry in sorted(self._slowest, reverse=True)]
+        return entries if count is None else entries[:count]
+
+    def lag_stats(self) -> dict:
+        """Return count, mean, p95 and max event loop lag in milliseconds"""
+        samples = sorted(self.lag)
+        if not samples:
+            return {"count": 0, "mean": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples),
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "max": samples[-1],
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "lag": self.lag_stats(),
+            "slowest": self.slowest(),
+            "recent": list(self.recent),
+        }
+
+    def dump(self, filepath: str):
+        with open(filepath, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+def timed(master: TKMLDriver, kind: str, name: str, source: str | None = None):
+    """Decorator which reports each call's duration to master's monitor, if it has one"""
+
+    def _decorator(func: callable) -> callable:
+        def _timed(*args):
+            monitor = getattr(master, "_tkml_monitor", None)
+            if monitor is None:
+                return func(*args)
+            start = time.perf_counter()
+            calls = monitor.calls
+            try:
+                return func(*args)
+            finally:
+                # A timer firing a throttled handler would otherwise be
+                # recorded twice, the innermost callback is the useful one
+                if monitor.calls == calls:
+                    monitor.record(kind, name, source, time.perf_counter() - start)
+
+        return _timed
+
+    return _decorator
+
+
+def new_resources() -> dict:
+    return {"after": set(), "tooltips": [], "variables": [], "images": []}
+
+
+def track(master: TKMLDriver, kind: str, resource):
+    """Record something the builder created for master so dispose() can free it
+
+    Masters which aren't drivers (eg. a plain tk.Tk) don't track anything
+    """
+    resources = getattr(master, "_tkml_resources", None)
+    if resources is not None:
+        resources[kind].append(resource)
+    return resource
+
+
+def schedule(master: TKMLDriver, ms: int, func: callable, *args) -> str:
+    """Same as master.after but the timer is cancelled when master is disposed"""
+    resources = getattr(master, "_tkml_resources", None)
+    if resources is None:
+        return master.after(ms, func, *args)
+
+    @timed(master, "after", getattr(func, "__qualname__", repr(func)))
+    def _fire():
+        resources["after"].discard(id_)
+        func(*args)
+
+    id_ = master.after(ms, _fire)
+    resources["after"].add(id_)
+    return id_
+
+
+def unschedule(master: TKMLDriver, id_: str):
+    """Cancel a timer started with schedule"""
+    resources = getattr(master, "_tkml_resources", None)
+    if resources is not None:
+        resources["after"].discard(id_)
+    master.after_cancel(id_)
+
+
+def dispose_driver(master: TKMLDriver, destroy: callable):
+    """Free everything the builder created for master
+
+    destroy is the driver's real destroy method. Timers, tooltips and the
+    monitor's heartbeat are stopped before the widgets go away, Tcl
+    variables and images are released afterwards so no live widget is left
+    pointing at them.
+    It is safe to call this more than once.
+    """
+    monitor = getattr(master, "_tkml_monitor", None)
+    if monitor is not None:
+        monitor.stop()
+    resources = master._tkml_resources
+    for id_ in resources["after"]:
+        master.after_cancel(id_)
+    for tooltip in resources["tooltips"]:
+        tooltip.dispose()
+
+    destroy()
+
+    for variable in resources["variables"]:
+        master.tk.call("unset", "-nocomplain", str(variable))
+    for image in resources["images"]:
+        master.tk.call("image", "delete", str(image))
+    for resource in resources.values():
+        resource.clear()
+    master._tkml_variables.clear()
+    master._on_init.clear()
+    master._widget_tree = None
+
+
+# Snapshot file layout, all little endian:
+#   header: magic, version byte, u32 record count
+#   record: kind byte, key, payload
+#   string: u32 byte length, utf-8 bytes
+#   value: type byte, then a string, i64, f64 or bool
+#   variable payload: value
+#   table payload: u32 row count, rows of (iid, text, u32 value count, values,
+#     lazy byte), has sort byte, (column, reverse byte, sort_by) if set, f64 yview
+#   notebook payload: u32 selected tab index
+SNAPSHOT_MAGIC = b"TKMLSNAP"
+SNAPSHOT_VERSION = 3
+_SNAPSHOT_HEADER = struct.Struct("<8sB")
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_RECORD_VARIABLE, _RECORD_TABLE, _RECORD_NOTEBOOK = range(3)
+_VALUE_STR, _VALUE_INT, _VALUE_FLOAT, _VALUE_BOOL = range(4)
+
+
+def _pack_str(out: bytearray, string: str):
+    data = string.encode("utf-8")
+    out += _U32.pack(len(data))
+    out += data
+
+
+def _pack_value(out: bytearray, value):
+    if isinstance(value, bool):
+        out.append(_VALUE_BOOL)
+        out.append(value)
+    elif isinstance(value, int) and -(2**63) <= value < 2**63:
+        out.append(_VALUE_INT)
+        out += _I64.pack(value)
+    elif isinstance(value, float):
+        out.append(_VALUE_FLOAT)
+        out += _F64.pack(value)
+    else:
+        out.append(_VALUE_STR)
+        _pack_str(out, str(value))
+
+
+class _SnapshotReader:
+    """Reads the values written by snapshot_driver straight out of a buffer"""
+
+    def __init__(self, buffer: memoryview):
+        self.buffer = buffer
+        self.offset = 0
+
+    def _unpack(self, struct_: struct.Struct):
+        value = struct_.unpack_from(self.buffer, self.offset)[0]
+        self.offset += struct_.size
+        return value
+
+    def u8(self) -> int:
+        return self._unpack(_U8)
+
+    def u32(self) -> int:
+        return self._unpack(_U32)
+
+    def f64(self) -> float:
+        return self._unpack(_F64)
+
+    def string(self) -> str:
+        length = self.u32()
+        start = self.offset
+        self.offset += length
+        if self.offset > len(self.buffer):
+            # Slicing would silently return less
+            raise ValueError("string runs past the end of the file")
+        return str(self.buffer[start : self.offset], "utf-8")
+
+    def value(self):
+        type_ = self.u8()
+        if type_ == _VALUE_BOOL:
+            return bool(self.u8())
+        if type_ == _VALUE_INT:
+            return self._unpack(_I64)
+        if type_ == _VALUE_FLOAT:
+            return self.f64()
+        if type_ == _VALUE_STR:
+            return self.string()
+        raise ValueError(f"unknown value type [{type_}]")
+
+    def rows(self, count: int):
+        for _ in range(count):
+            iid = self.string()
+            text = self.string()
+            values = tuple(self.value() for _ in range(self.u32()))
+            yield iid, text, values, bool(self.u8())
+
+
+def snapshot_driver(master: TKMLDriver, path: str):
+    """Write master's variables, tables and notebook tabs to path
+
+    Tables keep their top level rows, including rows hidden by a filter,
+    their sort state and scroll position. The file is written next to
+    path first and then moved over it, so a crash never leaves half a
+    snapshot behind.
+    """
+    out = bytearray(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+    # The record count is filled in once every record is written
+    out += _U32.pack(0)
+    count = 0
+    for key, value in master._tkml_variables.items():
+        if not isinstance(key, str):
+            continue
+        if isinstance(value, tk.Variable):
+            try:
+                current = value.get()
+            except tk.TclError:
+                # e.g. an IntVar holding text typed into an Entry
+                continue
+            out.append(_RECORD_VARIABLE)
+            _pack_str(out, key)
+            _pack_value(out, current)
+        elif isinstance(value, TKMLTreeView):
+            treeview = value.treeview
+            rows = treeview._all_rows
+            if rows is None:
+                rows = treeview.get_children("")
+            lazy = value._lazy_loader is not None
+            out.append(_RECORD_TABLE)
+            _pack_str(out, key)
+            out += _U32.pack(len(rows))
+            for row in rows:
+                _pack_str(out, row)
+                _pack_str(out, str(treeview.item(row, "text")))
+                values = treeview.item(row, "values") or ()
+                out += _U32.pack(len(values))
+                for item in values:
+                    _pack_value(out, item)
+                # Loaded children are dropped, the row loads them again
+                out.append(lazy and bool(treeview.get_children(row)))
+            if treeview._sort_state is None:
+                out.append(0)
+            else:
+                column, reverse, sort_by = treeview._sort_state
+                out.append(1)
+                _pack_str(out, column)
+                out.append(reverse)
+                _pack_str(out, sort_by)
+            out += _F64.pack(treeview.yview()[0])
+        elif isinstance(value, ttk.Notebook):
+            selected = value.select()
+            if not selected:
+                continue
+            out.append(_RECORD_NOTEBOOK)
+            _pack_str(out, key)
+            out += _U32.pack(value.index(selected))
+        else:
+            continue
+        count += 1
+    _U32.pack_into(out, _SNAPSHOT_HEADER.size, count)
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file_:
+        file_.write(out)
+    os.replace(temporary, path)
+
+
+def restore_driver(master: TKMLDriver, path: str):
+    """Load a file written by snapshot_driver back into master
+
+    The file is memory mapped and every record is decoded and checked
+    before anything is changed, so a damaged file raises TKMLRuntimeError
+    and leaves master as it was. Table rows are inserted with insert_many.
+    Records whose id no longer exists in the layout, or now names a
+    different kind of widget, are skipped.
+    """
+    with open(path, "rb") as file_:
+        if os.fstat(file_.fileno()).st_size < _SNAPSHOT_HEADER.size:
+            raise TKMLRuntimeError(f"[{path}] is not a TKML snapshot")
+        with mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            buffer = memoryview(mapped)
+            try:
+                records = _read_snapshot(path, buffer)
+            finally:
+                buffer.release()
+    _apply_snapshot(master, records)
+
+
+def _read_snapshot(path: str, buffer: memoryview) -> list:
+    """Decode every record of a snapshot into a list of (kind, key, payload)"""
+    magic, version = _SNAPSHOT_HEADER.unpack_from(buffer)
+    if magic != SNAPSHOT_MAGIC:
+        raise TKMLRuntimeError(f"[{path}] is not a TKML snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise TKMLRuntimeError(
+            f"[{path}] is a version {version} snapshot, expected {SNAPSHOT_VERSION}"
+        )
+    reader = _SnapshotReader(buffer)
+    reader.offset = _SNAPSHOT_HEADER.size
+    records = []
+    try:
+        for _ in range(reader.u32()):
+            kind = reader.u8()
+            key = reader.string()
+            if kind == _RECORD_VARIABLE:
+                payload = reader.value()
+            elif kind == _RECORD_TABLE:
+                rows = list(reader.rows(reader.u32()))
+                sort_state = None
+                if reader.u8():
+                    column = reader.string()
+                    reverse = bool(reader.u8())
+                    sort_by = reader.string()
+                    if not hasattr(SortableTreeview, f"_sort_by_{sort_by}"):
+                        raise ValueError(f"unknown sort [{sort_by}]")
+                    sort_state = (column, reverse, sort_by)
+                payload = (rows, sort_state, reader.f64())
+            elif kind == _RECORD_NOTEBOOK:
+                payload = reader.u32()
+            else:
+                raise ValueError(f"unknown record type [{kind}]")
+            records.append((kind, key, payload))
+        if reader.offset != len(buffer):
+            raise ValueError("unexpected data after the last record")
+    except (struct.error, ValueError) as e:
+        # ValueError includes UnicodeDecodeError
+        raise TKMLRuntimeError(f"[{path}] is damaged: {e}") from None
+    return records
+
+
+def _apply_snapshot(master: TKMLDriver, records: list):
+    scroll = []
+    for kind, key, payload in records:
+        target = master._tkml_variables.get(key)
+        if kind == _RECORD_VARIABLE:
+            if isinstance(target, tk.Variable):
+                target.set(payload)
+        elif kind == _RECORD_TABLE:
+            if not isinstance(target, TKMLTreeView):
+                continue
+            rows, sort_state, position = payload
+            treeview = target.treeview
+            current = treeview._all_rows
+            if current is None:
+                current = treeview.get_children("")
+            if current:
+                target.delete(*current)
+            treeview._all_rows = None
+            target.insert_many((iid, text, values) for iid, text, values, _ in rows)
+            for iid, _, _, lazy in rows:
+                if lazy and target._lazy_loader is not None:
+                    target._add_placeholder(iid)
+            if sort_state is not None:
+                # Rows were saved in sorted order, only the heading needs
+                # to know which way the next click sorts
+                column, reverse, sort_by = sort_state
+                treeview._sort_state = sort_state
+                callback = getattr(treeview, f"_sort_by_{sort_by}")
+                treeview.heading(column, command=partial(callback, column, not reverse))
+            scroll.append((treeview, position))
+        elif kind == _RECORD_NOTEBOOK:
+            if isinstance(target, ttk.Notebook) and payload < len(target.tabs()):
+                target.select(payload)
+
+    if scroll:
+        # yview_moveto needs the table's real height
+        master.update_idletasks()
+        for treeview, position in scroll:
+            treeview.yview_moveto(position)
+
+
+class TKMLListRow(TKMLDriver):
+    """Driver for one recycled row of a ListView
+
+    Anything the row doesn't define is looked up on the ListView's driver.
+    Methods found there are called with the index of the item the row is
+    currently showing, so command="remove" calls driver.remove(index).
+    """
+
+    # Stops build_tkml from running the owner's init for every row
+    init = None
+
+    def __init__(self, parent, owner):
+        self.owner = owner
+        self.index = None
+        super().__init__(parent)
+        # Looked up on the owner instead, so its monitor times row callbacks
+        del self._tkml_monitor
+
+    def __getattr__(self, name):
+        owner = self.__dict__.get("owner")
+        if owner is None:
+            raise AttributeError(name)
+        if name == "_tkml_monitor":
+            return getattr(owner, "_tkml_monitor", None)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attribute = getattr(owner, name)
+        if callable(attribute):
+            return partial(attribute, self.index)
+        return attribute
+
+
+class TKMLListView(ttk.Frame):
+    """A scrollable list which only builds rows for the items on screen
+
+    The template element is built once per visible row plus overscan rows
+    above and below. Scrolling moves those rows and binds them to different
+    items instead of building new ones, so the cost depends on the height
+    of the view rather than the number of items.
+    """
+
+    def __init__(
+        self,
+        parent,
+        widget_builder,
+        master,
+        template: xmlET.Element,
+        source: callable,
+        item_height: int,
+        overscan: int = 2,
+        bind_row: callable = None,
+        **kwargs,
+    ):
+        super().__init__(parent)
+        self.widget_builder = widget_builder
+        self.master_driver = master
+        self.template = template
+        self.source = source
+        self.item_height = item_height
+        self.overscan = overscan
+        self.bind_row = bind_row
+        self.items = []
+        # (row, canvas window) pairs, row i shows items i, i + len(rows), ...
+        self._rows = []
+
+        self.canvas = tk.Canvas(
+            self, highlightthickness=0, yscrollincrement=item_height, **kwargs
+        )
+        self.v_scrollbar = ttk.Scrollbar(
+            self, orient="vertical", command=self.canvas.yview
+        )
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.v_scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(expand=1, fill="both")
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self._bind_wheel(self.canvas)
+        self._loaded = False
+
+    def refresh(self):
+        """Reread the items from the source and rebind every visible row"""
+        self.set_items(self.source())
+
+    def set_items(self, items: list):
+        self.items = items
+        self._loaded = True
+        self.canvas.configure(scrollregion=(0, 0, 0, len(items) * self.item_height))
+        for row, _ in self._rows:
+            row.index = None
+        self._update()
+
+    def _on_configure(self, event):
+        for _, window in self._rows:
+            self.canvas.itemconfigure(window, width=event.width)
+        if not self._loaded:
+            # The driver's init has run by the time the list is first shown
+            self.refresh()
+        else:
+            self._update()
+
+    def _on_scroll(self, first, last):
+        self.v_scrollbar.set(first, last)
+        self._update()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", self._on_wheel, add="+")
+        widget.bind("<Button-5>", self._on_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, "units")
+        else:
+            self.canvas.yview_scroll(1, "units")
+
+    def _new_row(self) -> TKMLListRow:
+        row = TKMLListRow(self.canvas, self.master_driver)
+        self.widget_builder.build_tkml(row, self.template)
+        self._bind_wheel(row)
+        window = self.canvas.create_window(
+            0,
+            0,
+            window=row,
+            anchor="nw",
+            width=self.canvas.winfo_width(),
+            height=self.item_height,
+        )
+        self._rows.append((row, window))
+
+    def _update(self):
+        height = self.canvas.winfo_height()
+        first = int(self.canvas.canvasy(0)) // self.item_height
+        visible = -(-height // self.item_height) + 1
+        start = max(0, first - self.overscan)
+        end = min(len(self.items), first + visible + self.overscan)
+
+        if len(self._rows) < end - start:
+            while len(self._rows) < end - start:
+                self._new_row()
+            # The pool size changed so every row shows a different item now
+            for row, _ in self._rows:
+                row.index = None
+
+        shown = set()
+        for index in range(start, end):
+            row, window = self._rows[index % len(self._rows)]
+            shown.add(window)
+            if row.index != index:
+                self._bind_item(row, index)
+                self.canvas.coords(window, 0, index * self.item_height)
+                self.canvas.itemconfigure(window, state="normal")
+        for row, window in self._rows:
+            if window not in shown:
+                row.index = None
+                self.canvas.itemconfigure(window, state="hidden")
+
+    def _bind_item(self, row: TKMLListRow, index: int):
+        row.index = index
+        item = self.items[index]
+        values = item if isinstance(item, dict) else {"item": item}
+        for key, value in values.items():
+            variable = row._tkml_variables.get(key)
+            if isinstance(variable, tk.Variable):
+                variable.set(value)
+        if self.bind_row is not None:
+            self.bind_row(row, item)
+
+
+_executors = {}
+
+
+def get_executor(kind: str = "thread", workers: int | None = None):
+    """Return the shared worker pool for kind, creating it on first use
+
+    kind is either "thread" or "process". Pools are shared by every driver
+    which asks for the same kind and worker count.
+    """
+    key = (kind, workers)
+    if key not in _executors:
+        if kind == "thread":
+            _executors[key] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="tkml"
+            )
+        elif kind == "process":
+            _executors[key] = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise TKMLRuntimeError(f"Unrecognized executor type [{kind}]")
+    return _executors[key]
+
+
+def set_widget_enabled(widget: tk.Widget, enabled: bool):
+    """Enable or disable a widget regardless of whether it is tk, ttk or a ToggleFrame"""
+    if widget is None:
+        return
+    if isinstance(widget, ToggleFrame):
+        widget.enable() if enabled else widget.disable()
+    elif isinstance(widget, ttk.Widget):
+        widget.state(["!disabled" if enabled else "disabled"])
+    else:
+        widget.configure(state="normal" if enabled else "disabled")
+
+
+def get_method(master: TKMLDriver, function_name: str) -> callable:
+    func = getattr(master, function_name, None)
+    if not callable(func):
+        raise TKMLRuntimeError(
+            f"Attempted to call undefined function [{function_name}].\n"
+            + "Make sure that function is defined by the master widget."
+        )
+    return func
+
+
+def make_call(
+    master: TKMLDriver, function_name: str, source: str | None = None
+) -> callable:
+    @timed(master, "command", function_name, source)
+    def _call(*args):
+        # args is empty for widget commands and the event for Bind
         func = getattr(master, function_name)
         if not callable(func):
             raise TKMLRuntimeError(
                 f"Attempted to call undefined function [{function_name}].\n"
                 + "Make sure that function is defined by the master widget."
             )
-        func()
+        return func(*args)
 
     return _call
 
 
-def virtual_method(master: TKMLDriver, function: str) -> callable:
+class RateLimiter:
+    """Wraps an event handler so a burst of events calls it fewer times
+
+    Only the most recent event of a burst is passed on.
+    throttle: call at once, then at most once every throttle ms
+    debounce: call once no event has arrived for debounce ms
+    latest: call once the event queue is idle
+    """
+
+    def __init__(
+        self,
+        master: TKMLDriver,
+        func: callable,
+        throttle: int | None = None,
+        debounce: int | None = None,
+        latest: bool = False,
+    ):
+        self.master = master
+        self.func = func
+        self.throttle = throttle
+        self.debounce = debounce
+        self.latest = latest
+        self._event = None
+        self._timer = None
+
+    def __call__(self, event):
+        self._event = event
+        if self.debounce is not None:
+            if self._timer is not None:
+                unschedule(self.master, self._timer)
+            self._timer = schedule(self.master, self.debounce, self._fire)
+        elif self.throttle is not None:
+            if self._timer is None:
+                self._timer = schedule(self.master, self.throttle, self._window_end)
+                return self._call()
+        elif self._timer is None:
+            self._timer = schedule(self.master, "idle", self._fire)
+
+    def _call(self):
+        event, self._event = self._event, None
+        return self.func(event)
+
+    def _fire(self):
+        self._timer = None
+        self._call()
+
+    def _window_end(self):
+        self._timer = None
+        if self._event is not None:
+            # Events arrived during the window, pass on the last one
+            self._timer = schedule(self.master, self.throttle, self._window_end)
+            self._call()
+
+
+def virtual_method(
+    master: TKMLDriver, function: str, owner: list | None = None
+) -> callable:
+    """Build the callable for a virtual method like "name=offload; target=run;"
+
+    owner is filled with the widget the method is attached to once the
+    builder has created it, offload disables that widget while it runs.
+    """
     function_data = parse_dict(function)
     print("making virtual method", function_data)
     function_name = function_data["name"]
@@ -320,6 +2163,55 @@ def virtual_method(master: TKMLDriver, function: str) -> callable:
 
         # update the frame on init
         master._on_init.append(_call)
+        return _call
+    elif function_name == "offload":
+        target = function_data["target"]
+        on_done = function_data.get("on_done")
+        on_error = function_data.get("on_error")
+        widget = function_data.get("widget")
+        poll = function_data.get("poll", 20)
+        args = function_data.get("args", [])
+        if not isinstance(args, list):
+            args = [args]
+        executor = get_executor(
+            function_data.get("executor", "thread"), function_data.get("workers")
+        )
+        in_flight = []
+
+        def _invoker():
+            # Disable the invoking widget unless told otherwise
+            if widget is not None:
+                return master._tkml_variables.get(widget)
+            return owner[0] if owner else None
+
+        def _finish():
+            future = in_flight[0]
+            if not future.done():
+                schedule(master, poll, _finish)
+                return
+            in_flight.clear()
+            set_widget_enabled(_invoker(), True)
+            try:
+                result = future.result()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                get_method(master, on_error)(e)
+                return
+            if on_done is not None:
+                get_method(master, on_done)(result)
+
+        def _call(*event):
+            if in_flight:
+                # Ignore repeated presses while the call is running
+                return
+            func = get_method(master, target)
+            # Variables are read here because the worker must not touch tk
+            values = [lookup(master, arg).get() for arg in args]
+            in_flight.append(executor.submit(func, *values))
+            set_widget_enabled(_invoker(), False)
+            schedule(master, poll, _finish)
+
         return _call
     else:
         raise TKMLInvalidElement("Unrecognized Virtual Method", function)
@@ -329,102 +2221,572 @@ def lookup(master: TKMLDriver, id_: int):
     return master._tkml_variables[id_]
 
 
-def pull_layout_attributes(node: xmlET.Element):
-    """Remove Layout Params from Element Attributes and return them
+# Attributes which configure how the parent lays a widget out
+LAYOUT_ATTRIBUTES = ("rowspan", "columnspan", "side", "sticky", "fill", "expand")
+# Read by the parent widget so they are never passed to the widget itself
+_PARENT_ATTRIBUTES = frozenset(LAYOUT_ATTRIBUTES + ("tabname",))
 
-    Pulls: rowspan, columnspan, side, sticky, fill, expand
-    """
-    # Removes the layout manager keywords from the node attributes
-    layout_params = {}
-    if "rowspan" in node.attrib:
-        layout_params["rowspan"] = int(node.attrib["rowspan"])
-        node.attrib.pop("rowspan")
 
-    if "columnspan" in node.attrib:
-        layout_params["columnspan"] = int(node.attrib["columnspan"])
-        node.attrib.pop("columnspan")
+def pull_layout_attributes(node: xmlET.Element) -> dict:
+    """Return the Layout Params of the Element's Attributes
 
-    if "side" in node.attrib:
-        layout_params["side"] = node.attrib["side"]
-        node.attrib.pop("side")
+    Pulls: rowspan, columnspan, side, sticky, fill, expand
+    The element is left as it is, patch_attributes leaves these out instead
+    """
+    layout_params = {
+        key: node.attrib[key] for key in LAYOUT_ATTRIBUTES if key in node.attrib
+    }
+    for key in ("rowspan", "columnspan"):
+        if key in layout_params:
+            layout_params[key] = int(layout_params[key])
+    return layout_params
 
-    if "sticky" in node.attrib:
-        layout_params["sticky"] = node.attrib["sticky"]
-        node.attrib.pop("sticky")
 
-    if "fill" in node.attrib:
-        layout_params["fill"] = node.attrib["fill"]
-        node.attrib.pop("fill")
+def get_tooltip(node: xmlET.Element | dict) -> str | None:
+    """Remove the 'tooltip' attribute from node and return it if it exists
 
-    if "expand" in node.attrib:
-        layout_params["expand"] = node.attrib["expand"]
-        node.attrib.pop("expand")
+    node may also be a dict of attributes.
+    """
+    return _get_tooltip(node.attrib if isinstance(node, xmlET.Element) else node)
 
-    return layout_params
 
-def get_tooltip(node: xmlET.Element) -> str | None:
-    if "tooltip" in node.attrib:
-        return node.attrib.pop("tooltip")
+def _get_tooltip(attrib: dict) -> str | None:
+    if "tooltip" in attrib:
+        return attrib.pop("tooltip")
     else:
         return None
 
+
 def patch_attributes(master: TKMLDriver, node: xmlET.Element):
-    """Convert the node's attributes inplace"""
+    """Convert the node's attributes inplace
+
+    Layout params are dropped, like when the parent has already pulled them.
+    The builder itself uses _patch_attributes, which leaves node as it is.
+    """
+    node.attrib = _patch_attributes(master, node)
+
+
+def _patch_attributes(
+    master: TKMLDriver, node: xmlET.Element, owner: list | None = None
+) -> dict:
+    """Return a converted copy of the node's attributes without its layout params
+
+    The node itself is never changed, parsed layouts are shared by every build.
+    Callers append the widget the attributes are for to owner once it exists,
+    virtual methods use it to find the widget which invoked them.
+    """
+    attrib = {
+        key: value
+        for key, value in node.attrib.items()
+        if key not in _PARENT_ATTRIBUTES
+    }
     # Autoconvert numbers
-    for attribute in node.attrib:
+    for attribute in attrib:
         # Escape numbers if the start with '/'
-        if (
-            node.attrib[attribute].startswith("/")
-            and node.attrib[attribute][1:].isdigit()
-        ):
-            node.attrib[attribute] = node.attrib[attribute][1:]
+        if attrib[attribute].startswith("/") and attrib[attribute][1:].isdigit():
+            attrib[attribute] = attrib[attribute][1:]
             continue
         # Convert digits into numbers
-        if node.attrib[attribute].isdigit():
-            node.attrib[attribute] = int(node.attrib[attribute])
-        elif node.attrib[attribute] == "MATH_INF":
-            node.attrib[attribute] = inf
-        elif node.attrib[attribute] == "-MATH_INF":
-            node.attrib[attribute] = -inf
-
-    if "command" in node.attrib:
-        if node.attrib["command"].startswith("@"):  # Virtual Method
-            node.attrib["command"] = virtual_method(master, node.attrib["command"][1:])
+        if attrib[attribute].isdigit():
+            attrib[attribute] = int(attrib[attribute])
+        elif attrib[attribute] == "MATH_INF":
+            attrib[attribute] = inf
+        elif attrib[attribute] == "-MATH_INF":
+            attrib[attribute] = -inf
+
+    if "command" in attrib:
+        if attrib["command"].startswith("@"):  # Virtual Method
+            function = attrib["command"][1:]
+            attrib["command"] = timed(
+                master, "virtual", function, describe_element(node)
+            )(virtual_method(master, function, owner))
         else:
-            node.attrib["command"] = make_call(master, node.attrib["command"])
+            attrib["command"] = make_call(
+                master, attrib["command"], describe_element(node)
+            )
 
-    if "textvariable" in node.attrib:
-        node.attrib["textvariable"] = lookup(master, node.attrib["textvariable"])
+    if "textvariable" in attrib:
+        attrib["textvariable"] = lookup(master, attrib["textvariable"])
 
-    if "variable" in node.attrib:
-        node.attrib["variable"] = lookup(master, node.attrib["variable"])
+    if "variable" in attrib:
+        attrib["variable"] = lookup(master, attrib["variable"])
 
-    if "columns" in node.attrib:
-        node.attrib["columns"] = parse_list(node.attrib["columns"])
+    if "columns" in attrib:
+        attrib["columns"] = parse_list(attrib["columns"])
 
-    if "values" in node.attrib:
-        node.attrib["values"] = parse_list(node.attrib["values"])
+    if "values" in attrib:
+        attrib["values"] = parse_list(attrib["values"])
 
-    if "inline_style" in node.attrib:
-        inline_style_attribs = parse_dict(node.attrib["inline_style"])
-        node.attrib.pop("inline_style")
-        style_name = str(uuid.uuid4()) + "." + ("T" + node.tag)
+    if "inline_style" in attrib:
+        inline_style = attrib.pop("inline_style")
+        inline_style_attribs = parse_dict(inline_style)
+        # Named after the style text so rebuilding a layout reuses the same
+        # ttk style instead of adding a new one, ttk styles are never freed
+        style_name = (
+            str(uuid.uuid5(uuid.NAMESPACE_OID, inline_style)) + "." + ("T" + node.tag)
+        )
         dprint("New Inline Style", style_name, inline_style_attribs)
         ttk.Style().configure(style_name, **inline_style_attribs)
-        node.attrib["style"] = style_name
+        attrib["style"] = style_name
 
-    if "image" in node.attrib:
-        node.attrib["image"] = lookup(master, node.attrib["image"])
+    if "image" in attrib:
+        attrib["image"] = lookup(master, attrib["image"])
 
+    return attrib
 
-def get_id(node: xmlET.Element) -> str | None:
-    """Remove the 'id' attribute from node and return it if it exists"""
-    if "id" in node.attrib:
-        return node.attrib.pop("id")
+
+def get_id(node: xmlET.Element | dict) -> str | None:
+    """Remove the 'id' attribute from node and return it if it exists
+
+    node may also be a dict of attributes.
+    """
+    return _get_id(node.attrib if isinstance(node, xmlET.Element) else node)
+
+
+def _get_id(attrib: dict) -> str | None:
+    if "id" in attrib:
+        return attrib.pop("id")
     else:
         return None
 
 
+# (file, line) each element with a command was parsed from, used to
+# describe its callbacks
+_source_lines = weakref.WeakKeyDictionary()
+
+
+def parse_with_lines(text) -> tuple:
+    """Parse XML text or bytes and return (root, lines)
+
+    lines holds the line each element's start tag begins on, in the same
+    order as root.iter()
+    """
+    builder = xmlET.TreeBuilder()
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    lines = []
+
+    def _start(tag, attrib):
+        # Inside a handler expat reports where the event began
+        lines.append(parser.CurrentLineNumber)
+        builder.start(tag, attrib)
+
+    parser.StartElementHandler = _start
+    parser.EndElementHandler = builder.end
+    parser.CharacterDataHandler = builder.data
+    try:
+        parser.Parse(text, True)
+    except expat.ExpatError as e:
+        # Same error as xml.etree so callers don't need to know the difference
+        error = xmlET.ParseError(str(e))
+        error.code = e.code
+        error.position = (e.lineno, e.offset)
+        raise error from None
+    return builder.close(), lines
+
+
+def set_source_lines(root: xmlET.Element, filepath: str, lines: list):
+    """Remember where the elements of a parsed tree came from
+
+    Only elements with a command are kept, describe_element is only
+    used to name their callbacks
+    """
+    for node, line in zip(root.iter(), lines):
+        if "command" in node.attrib:
+            _source_lines[node] = (filepath, line)
+
+
+def describe_element(node: xmlET.Element) -> str:
+    """Return a short description of node like 'Button id="ok" (main.xml:12)'"""
+    description = node.tag
+    if "id" in node.attrib:
+        description += f' id="{node.attrib["id"]}"'
+    if node.tag == "Bind" and node.text:
+        description += f" {node.text.strip()}"
+    if node in _source_lines:
+        filepath, line = _source_lines[node]
+        description += f" ({os.path.basename(filepath)}:{line})"
+    return description
+
+
+def _parse_layout(filepath: str) -> tuple:
+    """Parse a layout file and return (filepath, mtime, root, lines)
+
+    This runs on worker threads and processes so it must not touch tk
+    """
+    mtime = os.stat(filepath).st_mtime_ns
+    with open(filepath, "rb") as file:
+        root, lines = parse_with_lines(file.read())
+    return filepath, mtime, root, lines
+
+
+class TKMLLayoutCache:
+    """Process wide store of parsed layout files keyed by absolute path
+
+    Files are parsed once and reparsed when their mtime changes. Every
+    <Include src="..."/> is replaced by the root of the file it names,
+    relative to the including file. The cache knows which files include
+    which, so a changed fragment only invalidates the layouts built from it.
+    The builder never changes the elements it visits, so every lookup
+    returns the same tree.
+    """
+
+    def __init__(self):
+        # filepath -> (mtime, root, lines) straight from the parser
+        self._parsed = {}
+        # filepath -> root with every Include replaced
+        self._layouts = {}
+        # filepath -> files it includes, and the reverse
+        self._includes = {}
+        self._dependents = {}
+
+    def get(self, filepath: str) -> xmlET.Element:
+        filepath = os.path.abspath(filepath)
+        self._refresh(filepath, set())
+        return self._expanded(filepath, ())
+
+    def expand(
+        self, root: xmlET.Element, filepath: str, lines: list | None = None
+    ) -> xmlET.Element:
+        """Replace the Includes of a tree which didn't come from a file, eg. a string
+
+        Includes are resolved relative to filepath
+        """
+        return self._expand(root, os.path.abspath(filepath), lines, (), record=False)
+
+    def preload(self, filepaths: list, workers: int | None = None, executor="thread"):
+        """Parse many layout files, and the files they include, ahead of time
+
+        Parsing holds the GIL, so the default executor="thread" only overlaps
+        reading the files and is no faster than parsing them one by one. Use
+        executor="process" to spread parsing over every core. Scripts which
+        do this must guard their entry point with if __name__ == "__main__"
+        because worker processes import it.
+        """
+        pending = list(dict.fromkeys(os.path.abspath(path) for path in filepaths))
+        pool = get_executor(executor, workers)
+        while pending:
+            found = {}
+            for filepath, mtime, root, lines in pool.map(_parse_layout, pending):
+                self._parsed[filepath] = (mtime, root, lines)
+                self._invalidate_layout(filepath)
+                for node in root.iter("Include"):
+                    if "src" in node.attrib:
+                        include = self._resolve(filepath, node.attrib["src"])
+                        if include not in self._parsed:
+                            found[include] = True
+            pending = list(found)
+
+    def invalidate(self, filepath: str | None = None):
+        """Forget a file and every layout which includes it, or everything if no filepath is given"""
+        if filepath is None:
+            self._parsed.clear()
+            self._layouts.clear()
+            self._includes.clear()
+            self._dependents.clear()
+        else:
+            filepath = os.path.abspath(filepath)
+            self._parsed.pop(filepath, None)
+            self._invalidate_layout(filepath)
+
+    def _invalidate_layout(self, filepath: str):
+        self._layouts.pop(filepath, None)
+        for dependent in self._dependents.get(filepath, ()):
+            self._invalidate_layout(dependent)
+
+    @staticmethod
+    def _resolve(filepath: str, src: str) -> str:
+        return os.path.abspath(os.path.join(os.path.dirname(filepath), src))
+
+    def _refresh(self, filepath: str, seen: set):
+        """Invalidate filepath and anything it includes which changed on disk"""
+        if filepath in seen:
+            return
+        seen.add(filepath)
+        entry = self._parsed.get(filepath)
+        if entry is not None and entry[0] != os.stat(filepath).st_mtime_ns:
+            self.invalidate(filepath)
+        for include in list(self._includes.get(filepath, ())):
+            self._refresh(include, seen)
+
+    def _expanded(self, filepath: str, stack: tuple) -> xmlET.Element:
+        if filepath in stack:
+            raise TKMLMalformedElement(
+                "Include cycle: " + " -> ".join(stack + (filepath,))
+            )
+        if filepath not in self._layouts:
+            if filepath not in self._parsed:
+                self._parsed[filepath] = _parse_layout(filepath)[1:]
+            _, root, lines = self._parsed[filepath]
+            self._layouts[filepath] = self._expand(root, filepath, lines, stack)
+        return self._layouts[filepath]
+
+    def _expand(
+        self,
+        root: xmlET.Element,
+        filepath: str,
+        lines: list | None,
+        stack: tuple,
+        record: bool = True,
+    ) -> xmlET.Element:
+        """Return root with every Include replaced and remember where its elements came from
+
+        root itself is never changed. Only the elements above an Include are
+        copied, everything else, including the included files, is shared.
+        """
+        if lines is not None:
+            set_source_lines(root, filepath, lines)
+
+        includes = set()
+        root = self._replace_includes(root, filepath, stack, includes)
+
+        if record:
+            for old in self._includes.get(filepath, ()):
+                self._dependents[old].discard(filepath)
+            self._includes[filepath] = includes
+            for include in includes:
+                self._dependents.setdefault(include, set()).add(filepath)
+
+        return root
+
+    def _replace_includes(
+        self, node: xmlET.Element, filepath: str, stack: tuple, includes: set
+    ) -> xmlET.Element:
+        """Return node, or a copy of it if there are Includes below it"""
+        if node.tag == "Include":
+            if "src" not in node.attrib:
+                raise TKMLMalformedElement("Include must have src value")
+            attrib = dict(node.attrib)
+            include = self._resolve(filepath, attrib.pop("src"))
+            includes.add(include)
+            source = self._expanded(include, stack + (filepath,))
+            # Attributes on the Include, eg. layout params or an id, win
+            replaced = node.makeelement(source.tag, {**source.attrib, **attrib})
+            replaced.text = source.text
+            replaced.extend(source)
+            if node in _source_lines:
+                # A command on the Include comes from the including file
+                source = node
+        elif next(node.iter("Include"), None) is None:
+            return node
+        else:
+            source = node
+            replaced = node.makeelement(node.tag, node.attrib)
+            replaced.text = node.text
+            replaced.extend(
+                [
+                    self._replace_includes(child, filepath, stack, includes)
+                    for child in node
+                ]
+            )
+        replaced.tail = node.tail
+        if source in _source_lines:
+            _source_lines[replaced] = _source_lines[source]
+        return replaced
+
+
+layout_cache = TKMLLayoutCache()
+
+
+def _read_image_file(filepath: str) -> tuple:
+    """Read an image file and return (mtime, bytes). Runs on worker threads"""
+    mtime = os.stat(filepath).st_mtime_ns
+    with open(filepath, "rb") as file:
+        return mtime, file.read()
+
+
+def _parse_factor(value) -> tuple:
+    """Convert a subsample or zoom attribute like "2" or "2, 3" to an (x, y) tuple"""
+    if isinstance(value, int):
+        return (value, value)
+    factor = parse_list(value)
+    return (factor[0], factor[1] if len(factor) > 1 else factor[0])
+
+
+class TKMLImageCache:
+    """Interpreter wide cache of PhotoImages loaded from files
+
+    Images are keyed by interpreter, file path, mtime, options and
+    subsample/zoom variant. When the decoded size of every image passes
+    byte_budget the least recently used ones are forgotten. Widgets still
+    showing a forgotten image keep it alive until they let go of it.
+    """
+
+    def __init__(self, byte_budget: int = 64 * 1024 * 1024, workers: int = 4):
+        self.byte_budget = byte_budget
+        self.workers = workers
+        self._images = OrderedDict()
+        self._bytes = 0
+        # (filepath, mtime) -> number of cached images made from that file
+        self._files = {}
+        self._reads = {}
+
+    def prefetch(self, filepaths: list):
+        """Start reading image files on the worker pool so get() doesn't wait on disk
+
+        Files which are already cached and unchanged on disk are skipped
+        """
+        pool = get_executor("thread", self.workers)
+        for filepath in filepaths:
+            filepath = os.path.abspath(filepath)
+            if filepath in self._reads:
+                continue
+            try:
+                mtime = os.stat(filepath).st_mtime_ns
+            except OSError:
+                # get() reports the missing file
+                continue
+            if (filepath, mtime) not in self._files:
+                self._reads[filepath] = pool.submit(_read_image_file, filepath)
+
+    def get(
+        self, master: tk.Misc, file: str, subsample=None, zoom=None, **options
+    ) -> tk.PhotoImage:
+        filepath = os.path.abspath(file)
+        mtime = os.stat(filepath).st_mtime_ns
+        subsample = None if subsample is None else _parse_factor(subsample)
+        zoom = None if zoom is None else _parse_factor(zoom)
+        key = (
+            master.tk,
+            filepath,
+            mtime,
+            tuple(sorted(options.items())),
+            subsample,
+            zoom,
+        )
+        if key in self._images:
+            self._images.move_to_end(key)
+            # A prefetch started before this file was cached isn't needed
+            self._reads.pop(filepath, None)
+            return self._images[key][0]
+
+        if subsample is not None or zoom is not None:
+            # Variants are computed from the cached full size image
+            image = self.get(master, file, **options)
+            if zoom is not None:
+                image = image.zoom(*zoom)
+            if subsample is not None:
+                image = image.subsample(*subsample)
+        else:
+            read = self._reads.pop(filepath, None)
+            read_mtime, data = (
+                _read_image_file(filepath) if read is None else read.result()
+            )
+            if read_mtime != mtime:
+                # The file changed after it was prefetched
+                read_mtime, data = _read_image_file(filepath)
+            image = tk.PhotoImage(master=master, data=data, **options)
+
+        size = image.width() * image.height() * 4
+        self._images[key] = (image, size)
+        self._bytes += size
+        self._files[(filepath, mtime)] = self._files.get((filepath, mtime), 0) + 1
+        while self._bytes > self.byte_budget and len(self._images) > 1:
+            evicted, (_, evicted_size) = self._images.popitem(last=False)
+            self._bytes -= evicted_size
+            file_key = evicted[1:3]
+            self._files[file_key] -= 1
+            if not self._files[file_key]:
+                del self._files[file_key]
+        return image
+
+    def clear(self):
+        self._images.clear()
+        self._files.clear()
+        self._reads.clear()
+        self._bytes = 0
+
+
+image_cache = TKMLImageCache()
+
+
+class TKMLWindowPool:
+    """Reuses TKMLTopLevelDriver windows instead of rebuilding them on every open
+
+    Closed windows are withdrawn and kept, keyed by layout file and driver
+    class. At most max_size windows are kept and windows which stay closed
+    for idle_timeout milliseconds are disposed. Pass None to keep them forever.
+    """
+
+    def __init__(
+        self, widget_builder, max_size: int = 8, idle_timeout: int | None = 60000
+    ):
+        self.widget_builder = widget_builder
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        # (key, driver, time released) oldest first
+        self._idle = []
+
+    def open(self, driver_class, filepath: str, **kwargs) -> TKMLTopLevelDriver:
+        """Return a built window for filepath, reusing a closed one if possible
+
+        kwargs are passed to driver_class when a new window is built. When a
+        window is reused they are written back into its variables instead.
+        """
+        key = (os.path.abspath(filepath), driver_class)
+        for index, (idle_key, driver, _) in enumerate(self._idle):
+            if idle_key == key:
+                del self._idle[index]
+                if not driver.winfo_exists():
+                    # Destroyed behind our back, eg. by its parent
+                    break
+                self._reset(driver, kwargs)
+                driver.deiconify()
+                return driver
+
+        driver = driver_class(**kwargs)
+        driver._tkml_pool = self
+        driver._tkml_pool_key = key
+        self.widget_builder.build_tkml_from_file(driver, filepath)
+        return driver
+
+    def release(self, driver: TKMLTopLevelDriver):
+        if any(idle is driver for _, idle, _ in self._idle):
+            # Already closed, eg. by both a button and WM_DELETE_WINDOW
+            return
+        driver.withdraw()
+        self._idle.append((driver._tkml_pool_key, driver, time.monotonic()))
+        while len(self._idle) > self.max_size:
+            self._idle.pop(0)[1].dispose()
+        if self.idle_timeout is not None:
+            schedule(driver, self.idle_timeout, self.evict_idle)
+
+    def evict_idle(self):
+        """Dispose every window which has been closed for longer than idle_timeout"""
+        cutoff = time.monotonic() - self.idle_timeout / 1000
+        expired = [entry for entry in self._idle if entry[2] <= cutoff]
+        self._idle = [entry for entry in self._idle if entry[2] > cutoff]
+        for _, driver, _ in expired:
+            driver.dispose()
+
+    def clear(self):
+        """Dispose every window held by the pool"""
+        idle = self._idle
+        self._idle = []
+        for _, driver, _ in idle:
+            driver.dispose()
+
+    def _reset(self, driver: TKMLTopLevelDriver, kwargs: dict):
+        for name, value in kwargs.items():
+            if name in driver._tkml_variables:
+                target = driver._tkml_variables[name]
+            else:
+                target = getattr(driver, name, None)
+
+            if isinstance(target, tk.Variable):
+                target.set(value)
+            elif name in driver._tkml_variables:
+                driver._tkml_variables[name] = value
+            else:
+                setattr(driver, name, value)
+
+        driver._tkml_init()
+        if hasattr(driver, "init"):
+            initializer = getattr(driver, "init")
+            if callable(initializer):
+                driver.init()
+
+
 class TKMLWidgetBuilder:
     def __init__(self, print_debug=True, parser=None):
         self.terminals = {
@@ -437,8 +2799,9 @@ class TKMLWidgetBuilder:
             "Entry": lambda master, node, parent: self._handle_terminal(
                 master, node, parent, ttk.Entry
             ),
-            "Text": lambda master, node, parent: self._handle_terminal(
-                master, node, parent, tk.Text
+            "Text": self._handle_terminal_text,
+            "LogView": lambda master, node, parent: self._handle_terminal(
+                master, node, parent, TKMLLogView
             ),
             "Checkbutton": lambda master, node, parent: self._handle_terminal(
                 master, node, parent, ttk.Checkbutton
@@ -458,6 +2821,8 @@ class TKMLWidgetBuilder:
             # Special Items
             "Table": self._handle_terminal_table,
             "OptionMenu": self._handle_terminal_optionmenu,
+            "CellGrid": self._handle_terminal_cellgrid,
+            "AutoCombobox": self._handle_terminal_autocombobox,
         }
         self.commands = {
             "RowConfigure": self._handle_command,
@@ -484,6 +2849,7 @@ class TKMLWidgetBuilder:
                 master, node, parent, ToggleFrame
             ),
             "Notebook": self._handle_notebook,
+            "ListView": self._handle_listview,
             "Toplevel": lambda master, node, parent: self._handle_toplevel(
                 master, node, parent, ttk.Toplevel
             ),
@@ -505,8 +2871,10 @@ class TKMLWidgetBuilder:
         )
 
     def add_command(self, command_name, command):
+        # Handlers get their own copy of the element, so the old helpers
+        # which change it in place don't change the cached layout
         self.commands[command_name] = lambda master, node, parent: command(
-            self, master, node, parent
+            self, master, copy.copy(node), parent
         )
 
     def add_branching(self, widget_name, widget):
@@ -518,17 +2886,29 @@ class TKMLWidgetBuilder:
 
     def add_layout(self, layout_type, function):
         self.layouts[layout_type] = lambda master, node, parent: function(
-            self, master, node, parent
+            self, master, copy.copy(node), parent
         )
 
     def _handle_terminal_table(
         self, master, node: xmlET.Element, parent: tk.Widget
     ) -> TKMLTreeView:
-        patch_attributes(master, node)
+        attrib = _patch_attributes(master, node)
 
-        id_ = get_id(node)
+        id_ = _get_id(attrib)
 
-        widget = TKMLTreeView(parent, **node.attrib)
+        lazy_children = attrib.pop("lazy_children", None)
+        lazy_offload = bool(attrib.pop("lazy_offload", 0))
+        lazy_unload = attrib.pop("lazy_unload", None)
+
+        widget = TKMLTreeView(parent, **attrib)
+
+        if lazy_children is not None:
+            # Looked up when a row opens so drivers can swap it at runtime
+            widget.enable_lazy_children(
+                lambda item: get_method(master, lazy_children)(item),
+                lazy_offload,
+                lazy_unload,
+            )
 
         for child in node:
             if child.tag not in self.commands:
@@ -542,26 +2922,118 @@ class TKMLWidgetBuilder:
 
         return widget
 
+    def _handle_terminal_cellgrid(
+        self, master, node: xmlET.Element, parent: tk.Widget
+    ) -> TKMLCellGrid:
+        attrib = _patch_attributes(master, node)
+
+        id_ = _get_id(attrib)
+
+        matrix = None
+        if "source" in attrib:
+            matrix = getattr(master, attrib.pop("source"))
+            attrib.setdefault("rows", len(matrix))
+            attrib.setdefault("cols", max((len(row) for row in matrix), default=0))
+
+        if "rows" not in attrib or "cols" not in attrib:
+            raise TKMLMalformedElement("CellGrid must have rows and cols or a source")
+
+        if "on_click" in attrib:
+            attrib["on_click"] = get_method(master, attrib["on_click"])
+
+        widget = TKMLCellGrid(parent, **attrib)
+        if matrix is not None:
+            widget.set_matrix(matrix)
+
+        if id_ is not None:
+            master._tkml_variables[id_] = widget
+
+        return widget
+
+    def _handle_terminal_text(
+        self, master, node: xmlET.Element, parent: tk.Widget
+    ) -> tk.Text:
+        attrib = _patch_attributes(master, node)
+
+        id_ = _get_id(attrib)
+        tooltip = _get_tooltip(attrib)
+        budget = attrib.pop("highlight_budget", 8)
+
+        widget = tk.Text(parent, **attrib)
+
+        rules = []
+        for child in node:
+            if child.tag == "Highlight":
+                if "pattern" not in child.attrib or "tag" not in child.attrib:
+                    raise TKMLMalformedElement("Highlight must have pattern and tag")
+                # Read from the element so patterns made of digits aren't ints
+                pattern = re.compile(child.attrib["pattern"])
+                tag = child.attrib["tag"]
+                options = _patch_attributes(master, child)
+                del options["pattern"], options["tag"]
+                widget.tag_configure(tag, **options)
+                rules.append((pattern, tag))
+            elif child.tag in self.commands:
+                self.commands[child.tag](master, child, widget)
+            else:
+                raise TKMLInvalidElement(
+                    f"Cannot have non-command as child of Text: {child.tag}"
+                )
+
+        if rules:
+            widget.highlighter = TKMLHighlighter(widget, rules, budget)
+
+        if id_ is not None:
+            master._tkml_variables[id_] = widget
+
+        if tooltip is not None:
+            track(master, "tooltips", CreateToolTip(widget, tooltip))
+
+        return widget
+
+    def _handle_terminal_autocombobox(
+        self, master, node: xmlET.Element, parent: tk.Widget
+    ) -> AutoCombobox:
+        attrib = _patch_attributes(master, node)
+
+        id_ = _get_id(attrib)
+        tooltip = _get_tooltip(attrib)
+
+        if "source" in attrib:
+            values = lookup(master, attrib.pop("source"))
+        elif "values" in attrib:
+            values = tuple(attrib.pop("values"))
+        else:
+            raise TKMLMalformedElement("AutoCombobox must have source or values")
+
+        widget = AutoCombobox(parent, get_prefix_index(values), **attrib)
+
+        if id_ is not None:
+            master._tkml_variables[id_] = widget
+
+        if tooltip is not None:
+            track(master, "tooltips", CreateToolTip(widget, tooltip))
+
+        return widget
+
     def _handle_terminal_optionmenu(
         self, master, node: xmlET.Element, parent: tk.Widget
     ) -> ttk.OptionMenu:
-        patch_attributes(master, node)
+        attrib = _patch_attributes(master, node)
 
-        id_ = get_id(node)
+        id_ = _get_id(attrib)
 
-        if "options" not in node.attrib:
+        if "options" not in attrib:
             raise TKMLMalformedElement("OptionMenu must have options value")
 
-        if "textvariable" not in node.attrib:
+        if "textvariable" not in attrib:
             raise TKMLMalformedElement("OptionMenu must have textvariable")
 
-        options = parse_list(node.attrib["options"])
-        node.attrib.pop("options")
-        textvariable = node.attrib.pop("textvariable")
+        options = parse_list(attrib["options"])
+        attrib.pop("options")
+        textvariable = attrib.pop("textvariable")
         textvariable.set(options[0])
-        widget = ttk.OptionMenu(
-            parent, textvariable, options[0], *options, **node.attrib
-        )
+        widget = ttk.OptionMenu(parent, textvariable, options[0], *options, **attrib)
         if id_ is not None:
             master._tkml_variables[id_] = widget
 
@@ -573,12 +3045,14 @@ class TKMLWidgetBuilder:
         if node.tag not in self.terminals:
             raise TKMLInvalidElement(f"Expected Terminal Node got {node.tag}")
 
-        patch_attributes(master, node)
+        owner = []
+        attrib = _patch_attributes(master, node, owner)
 
-        id_ = get_id(node)
-        tooltip = get_tooltip(node)
+        id_ = _get_id(attrib)
+        tooltip = _get_tooltip(attrib)
 
-        widget = widget_type(parent, **node.attrib)
+        widget = widget_type(parent, **attrib)
+        owner.append(widget)
 
         if id_ is not None:
             master._tkml_variables[id_] = widget
@@ -587,7 +3061,7 @@ class TKMLWidgetBuilder:
             widget.state(["!alternate"])
 
         if tooltip is not None:
-            CreateToolTip(widget, tooltip)
+            track(master, "tooltips", CreateToolTip(widget, tooltip))
 
         return widget
 
@@ -595,58 +3069,83 @@ class TKMLWidgetBuilder:
         if node.tag not in self.commands:
             raise Exception(f"Expected Command Node got {node.tag}")
 
-        patch_attributes(master, node)
+        # Bind commands belong to the widget they are bound to
+        attrib = _patch_attributes(master, node, [parent])
 
-        dprint("command", node.tag, node.attrib)
+        dprint("command", node.tag, attrib)
         if node.tag == "RowConfigure":
-            parent.grid_rowconfigure(int(node.text), **node.attrib)
+            parent.grid_rowconfigure(int(node.text), **attrib)
 
         elif node.tag == "ColumnConfigure":
-            parent.grid_columnconfigure(int(node.text), **node.attrib)
+            parent.grid_columnconfigure(int(node.text), **attrib)
 
         elif node.tag == "Geometry":
             parent.winfo_toplevel().geometry(node.text)
 
         elif node.tag == "Heading":
-            parent.heading(node.text, **node.attrib)
+            parent.heading(node.text, **attrib)
 
         elif node.tag == "Column":
-            parent.column(node.text, **node.attrib)
+            parent.column(node.text, **attrib)
 
         elif node.tag == "Bind":
-            parent.bind(node.text, **node.attrib)
+            throttle = attrib.pop("throttle", None)
+            debounce = attrib.pop("debounce", None)
+            latest = bool(attrib.pop("latest", 0))
+            if "command" in attrib:
+                attrib["func"] = attrib.pop("command")
+            if throttle is not None or debounce is not None or latest:
+                if not callable(attrib.get("func")):
+                    raise TKMLMalformedElement(
+                        "Bind needs a command to use throttle, debounce or latest"
+                    )
+                attrib["func"] = RateLimiter(
+                    master, attrib["func"], throttle, debounce, latest
+                )
+            parent.bind(node.text, **attrib)
 
         elif node.tag == "String":
-            id_ = node.attrib.pop("id")
-            master._tkml_variables[id_] = tk.StringVar(**node.attrib)
+            id_ = attrib.pop("id")
+            master._tkml_variables[id_] = track(
+                master, "variables", tk.StringVar(**attrib)
+            )
 
         elif node.tag == "Int":
-            id_ = node.attrib.pop("id")
-            print(node.attrib)
-            master._tkml_variables[id_] = tk.IntVar(**node.attrib)
+            id_ = attrib.pop("id")
+            print(attrib)
+            master._tkml_variables[id_] = track(
+                master, "variables", tk.IntVar(**attrib)
+            )
 
         elif node.tag == "Style":
-            ttk.Style().configure(node.text, **node.attrib)
+            ttk.Style().configure(node.text, **attrib)
 
         elif node.tag == "PhotoImage":
-            id_ = node.attrib["id"]
-            node.attrib.pop("id")
-            master._tkml_variables[id_] = tk.PhotoImage(**node.attrib)
+            id_ = attrib.pop("id")
+            if "file" in attrib:
+                # Shared between drivers so dispose() must not delete it
+                master._tkml_variables[id_] = image_cache.get(
+                    master, **attrib
+                )
+            else:
+                master._tkml_variables[id_] = track(
+                    master, "images", tk.PhotoImage(**attrib)
+                )
 
         elif node.tag == "Title":
             parent.winfo_toplevel().title(node.text)
 
         elif node.tag == "GetVar":
-            python_name = node.attrib["python"]
-            id_ = node.attrib["id"]
+            python_name = attrib["python"]
+            id_ = attrib["id"]
             master._tkml_variables[id_] = getattr(master, python_name)
 
         return None
 
     def _layout_Grid(self, master, node, parent):
         dprint("LAYOUT TYPE: Grid")
-        rowweight = node.attrib.pop("rowweight")
-        columnweight = node.attrib.pop("columnweight")
+        rowweight = node.attrib.get("rowweight")
+        columnweight = node.attrib.get("columnweight")
         row_max = 0
         column_max = 0
         occupied = {}
@@ -740,28 +3239,18 @@ class TKMLWidgetBuilder:
     def _handle_branching(
         self, master, node: xmlET.Element, parent: tk.Widget, widget_type: tk.Widget
     ) -> tk.Widget:
-        patch_attributes(master, node)
+        attrib = _patch_attributes(master, node)
 
-        if "layout" in node.attrib:
-            layout_type = node.attrib["layout"]
-            node.attrib.pop("layout")
-        else:
-            layout_type = "V"
+        layout_type = attrib.pop("layout", "V")
 
         # Patch ID Attribute
-        id_ = get_id(node)
+        id_ = _get_id(attrib)
 
-        rowweight = columnweight = None
-        if "rowweight" in node.attrib:
-            rowweight = node.attrib.pop("rowweight")
-        if "columnweight" in node.attrib:
-            columnweight = node.attrib.pop("columnweight")
+        # The widget itself doesn't accept these, the Grid layout reads them
+        attrib.pop("rowweight", None)
+        attrib.pop("columnweight", None)
 
-        widget = widget_type(parent, **node.attrib)
-
-        # The widget itself doesn't accept these, but we need them in the Grid layout
-        node.attrib["rowweight"] = rowweight
-        node.attrib["columnweight"] = columnweight
+        widget = widget_type(parent, **attrib)
 
         # Add ID Attribute to Master
         if id_ is not None:
@@ -770,18 +3259,16 @@ class TKMLWidgetBuilder:
         return self.layouts[layout_type](master, node, widget)
 
     def _handle_notebook(self, master, node: xmlET.Element, parent: tk.Widget):
-        patch_attributes(master, node)
-        id_ = get_id(node)
+        attrib = _patch_attributes(master, node)
+        id_ = _get_id(attrib)
 
-        notebook_widget = ttk.Notebook(parent, **node.attrib)
+        notebook_widget = ttk.Notebook(parent, **attrib)
 
         for child in node:
             if child.tag in self.commands:
                 self._handle_command(master, child, notebook_widget)
                 continue
-            tabname = child.tag
-            if "tabname" in child.attrib:
-                tabname = child.attrib.pop("tabname")
+            tabname = child.attrib.get("tabname", child.tag)
 
             child_widget = self._handle_any(master, child, notebook_widget)
 
@@ -792,6 +3279,46 @@ class TKMLWidgetBuilder:
 
         return notebook_widget
 
+    def _handle_listview(
+        self, master, node: xmlET.Element, parent: tk.Widget
+    ) -> TKMLListView:
+        attrib = _patch_attributes(master, node)
+        id_ = _get_id(attrib)
+
+        if "source" not in attrib:
+            raise TKMLMalformedElement("ListView must have source value")
+        if "item_height" not in attrib:
+            raise TKMLMalformedElement("ListView must have item_height value")
+
+        source = attrib.pop("source")
+        bind_row = attrib.pop("bind_row", None)
+        templates = [child for child in node if child.tag not in self.commands]
+        if len(templates) != 1:
+            raise TKMLMalformedElement(
+                f"ListView must have exactly one template element, got {len(templates)}"
+            )
+
+        widget = TKMLListView(
+            parent,
+            self,
+            master,
+            templates[0],
+            lambda: getattr(master, source),
+            attrib.pop("item_height"),
+            attrib.pop("overscan", 2),
+            None if bind_row is None else get_method(master, bind_row),
+            **attrib,
+        )
+
+        for child in node:
+            if child.tag in self.commands:
+                self._handle_command(master, child, widget)
+
+        if id_ is not None:
+            master._tkml_variables[id_] = widget
+
+        return widget
+
     def _handle_any(
         self, master, node: xmlET.Element, parent: tk.Widget
     ) -> None | tk.Widget:
@@ -809,6 +3336,14 @@ class TKMLWidgetBuilder:
             raise TKMLInvalidElement(
                 f"Expected Element Type got {type(xml_root)} Type. Did you forget to call getroot()?"
             )
+        # Read every image file in parallel before the tree is walked
+        image_cache.prefetch(
+            [
+                node.attrib["file"]
+                for node in xml_root.iter("PhotoImage")
+                if "file" in node.attrib
+            ]
+        )
         layout_attributes = {"expand": 1, "fill": "both"}
         layout_attributes.update(pull_layout_attributes(xml_root))
         root_widget = self._handle_any(master, xml_root, master)
@@ -825,8 +3360,25 @@ class TKMLWidgetBuilder:
             if callable(initializer):
                 master.init()
 
+    def preload(self, filepaths: list, workers: int | None = None, executor="thread"):
+        """Parse layout files ahead of time so build_tkml_from_file doesn't have to"""
+        layout_cache.preload(filepaths, workers, executor)
+
     def build_tkml_from_file(self, master: TKMLDriver, filepath: str):
-        self.build_tkml(master, xmlET.parse(filepath, self.parser).getroot())
+        if self.parser is None:
+            xml_root = layout_cache.get(filepath)
+        else:
+            # Custom parsers may build different trees so they bypass the cache
+            xml_root = layout_cache.expand(
+                xmlET.parse(filepath, self.parser).getroot(), filepath
+            )
+        self.build_tkml(master, xml_root)
 
     def build_tkml_from_string(self, master: TKMLDriver, xmlstring: str):
-        self.build_tkml(master, xmlET.fromstring(xmlstring, self.parser))
+        if self.parser is None:
+            xml_root, lines = parse_with_lines(xmlstring)
+        else:
+            xml_root, lines = xmlET.fromstring(xmlstring, self.parser), None
+        # Includes in a string are relative to the working directory
+        xml_root = layout_cache.expand(xml_root, "<string>", lines)
+        self.build_tkml(master, xml_root)